@@ -1,17 +1,30 @@
 ﻿from __future__ import annotations
 
+import atexit
+import codecs
 import csv
+import hashlib
+import heapq
 import io
 import json
 import logging
+import multiprocessing
+import os
 import re
+import tempfile
+import threading
 import unicodedata
-from collections import Counter, defaultdict
-from concurrent.futures import ThreadPoolExecutor
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from datetime import date, datetime
 from pathlib import Path
-from typing import Callable, Dict, Iterable, List, Optional, Tuple
-from zipfile import ZipFile
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from zipfile import ZipFile, ZipInfo
 from xml.etree import ElementTree as ET
 
 from backend.types import ImportedDoc
@@ -27,36 +40,48 @@ SUPPORTED_KINDS = {
     "pdf": "PDF",
     "ocr": "OCR_TEXT",
 }
-
-BRAZILIAN_STATES = {
-    "AC",
-    "AL",
-    "AM",
-    "AP",
-    "BA",
-    "CE",
-    "DF",
-    "ES",
-    "GO",
-    "MA",
-    "MG",
-    "MS",
-    "MT",
-    "PA",
-    "PB",
-    "PE",
-    "PI",
-    "PR",
-    "RJ",
-    "RN",
-    "RO",
-    "RR",
-    "RS",
-    "SC",
-    "SE",
-    "SP",
-    "TO",
-}
+ZIP_MEMBER_EXTENSIONS = frozenset({"xml", "pdf", "ocr", "csv"})
+# Below this much CPU-bound input, handing work to worker processes costs more than it saves.
+PROCESS_POOL_MIN_BYTES = 4 * 1024 * 1024
+
+# The opt-in process pool starts its workers with spawn: callers are multi-threaded,
+# and a forked child could inherit locks (logging, caches) held by another thread.
+_SPAWN_CONTEXT = multiprocessing.get_context("spawn")
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+_PROCESS_POOL_LOCK = threading.Lock()
+_IN_POOL_WORKER = False
+
+BRAZILIAN_STATES = frozenset(
+    {
+        "AC",
+        "AL",
+        "AM",
+        "AP",
+        "BA",
+        "CE",
+        "DF",
+        "ES",
+        "GO",
+        "MA",
+        "MG",
+        "MS",
+        "MT",
+        "PA",
+        "PB",
+        "PE",
+        "PI",
+        "PR",
+        "RJ",
+        "RN",
+        "RO",
+        "RR",
+        "RS",
+        "SC",
+        "SE",
+        "SP",
+        "TO",
+    }
+)
 
 CSV_FIELD_ALIASES: Dict[str, List[str]] = {
     "nfe_id": [
@@ -295,86 +320,160 @@ DATE_FIELDS: Tuple[str, ...] = ("data_emissao",)
 
 MAX_CHART_ITEMS = 6
 
+# (field, alias, alias tokens) for every alias, plus an inverted index from each
+# alias token to its entries, so a header only revisits aliases it can match.
+_ALIAS_ENTRIES: Tuple[Tuple[str, str, frozenset[str]], ...] = tuple(
+    (field, alias, frozenset(alias.split()))
+    for field, aliases in CSV_FIELD_ALIASES.items()
+    for alias in aliases
+    if alias.split()
+)
+_ALIAS_TOKEN_INDEX: Dict[str, Tuple[int, ...]] = {
+    token: tuple(index for index, (_, _, tokens) in enumerate(_ALIAS_ENTRIES) if token in tokens)
+    for token in {token for _, _, tokens in _ALIAS_ENTRIES for token in tokens}
+}
 
+NFE_STREAMING_THRESHOLD = 64 * 1024
+# Extracted PDF texts kept per process, keyed by content digest.
+PDF_TEXT_CACHE_SIZE = 256
+OCR_RENDER_DPI = 200
+
+CSV_DELIMITER_CANDIDATES: Tuple[str, ...] = (",", ";", "\t", "|")
+CSV_READ_BLOCK_SIZE = 1 << 20
+# Prefix of a streamed CSV used to rule out candidate encodings before parsing.
+CSV_ENCODING_SNIFF_BYTES = 64 * 1024
+# From this size on, CSVs are decoded from a stream instead of read and decoded whole.
+CSV_STREAMING_THRESHOLD = 8 * 1024 * 1024
+HEADER_SEARCH_ROWS = 5
+
+# Single alternation for the OCR metadata scan; dispatch on ``match.lastgroup``.
+_RE_TEXT_METADATA = re.compile(
+    r"CFOP\s*[:\-]?\s*(?P<cfop>\d{4})"
+    r"|NCM\s*[:\-]?\s*(?P<ncm>\d{8})"
+    r"|Valor\s+Total(?:\s+da\s+NF-?e|)\s*[:\-]?\s*(?P<total>[\d\.,]+)"
+    # The CNPJ label and number must share a line, as the former per-line search required.
+    r"|CNPJ[ \t]*[:\-]?[ \t]*(?P<cnpj>[\d\.\-/]{14,18})"
+    r"|\bUF\s*[:\-]?\s*(?P<uf>[A-Z]{2})\b",
+    re.IGNORECASE,
+)
+# Searched on its own: the labelled alternatives above may consume digits of an access key.
+_RE_CHAVE = re.compile(r"\d{44}")
+# Deletion table for str.translate over Latin-1 (accented Portuguese text included);
+# characters beyond U+00FF are not in the table, so such input falls back to str.isdigit.
+_LATIN1_NON_DIGITS = str.maketrans("", "", "".join(chr(code) for code in range(256) if not chr(code).isdigit()))
+# Latin-1 characters _sanitize_filename replaces with "_" (same fallback beyond U+00FF).
+_LATIN1_FILENAME_UNSAFE = str.maketrans(
+    {chr(code): "_" for code in range(256) if not (chr(code).isalnum() or chr(code) in "_-.")}
+)
+# Strings float() accepts once thousands separators are dropped and the decimal comma swapped.
+_RE_DECIMAL = re.compile(r"\s*[+-]?(?:\d+\.?\d*|\.\d+)\s*")
+_RE_SPLIT_WS = re.compile(r"\s{2,}")
+_RE_HAS_ALPHA = re.compile(r"[A-Za-z]")
+_RE_DATE = re.compile(r"\b(\d{2}/\d{2}/\d{4}|\d{4}-\d{2}-\d{2})\b")
+_RE_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_RE_WHITESPACE = re.compile(r"\s+")
+_RE_DOT_OR_SPACE = re.compile(r"[.\s]")
+_RE_NON_DIGIT = re.compile(r"\D")
+_RE_ASCII_ALPHA = re.compile(r"[a-zA-Z]")
+_RE_COMMA_DECIMAL = re.compile(r"\d,\d")
+_RE_DOT_DECIMAL = re.compile(r"\d\.\d")
+
+
+@lru_cache(maxsize=4096)
 def _normalize_text(value: str) -> str:
-    normalized = unicodedata.normalize("NFKD", value or "")
-    no_accents = "".join(ch for ch in normalized if not unicodedata.combining(ch))
-    cleaned = re.sub(r"[^a-z0-9]+", " ", no_accents.lower()).strip()
-    return re.sub(r"\s+", " ", cleaned)
-
-
-def _score_header_match(normalized_header: str, aliases: List[str]) -> float:
+    value = value or ""
+    if value.isascii():
+        # NFKD leaves ASCII untouched and there are no combining marks to drop.
+        no_accents = value
+    else:
+        # is_normalized answers from the quick-check tables without building a copy.
+        normalized = value if unicodedata.is_normalized("NFKD", value) else unicodedata.normalize("NFKD", value)
+        no_accents = "".join(ch for ch in normalized if not unicodedata.combining(ch))
+    cleaned = _RE_NON_ALNUM.sub(" ", no_accents.lower()).strip()
+    return _RE_WHITESPACE.sub(" ", cleaned)
+
+
+# Exports built from the same template repeat their headers across files; the
+# cached score dicts are shared, so callers must treat them as read-only.
+@lru_cache(maxsize=1024)
+def _score_header_aliases(normalized_header: str) -> Dict[str, float]:
+    """Scores a normalized header against the aliases of every field in a single pass."""
     if not normalized_header:
-        return 0.0
+        return {}
     header_tokens = set(normalized_header.split())
-    best_score = 0.0
-    for alias in aliases:
-        alias_tokens = set(alias.split())
-        if not alias_tokens:
-            continue
+    candidates = {index for token in header_tokens for index in _ALIAS_TOKEN_INDEX.get(token, ())}
+    candidates.update(
+        index for index, (_, alias, _) in enumerate(_ALIAS_ENTRIES) if alias in normalized_header
+    )
+    scores: Dict[str, float] = {}
+    for index in candidates:
+        field, alias, alias_tokens = _ALIAS_ENTRIES[index]
         if normalized_header == alias:
-            return 1.0
-        token_overlap = len(header_tokens & alias_tokens) / len(alias_tokens)
-        if alias in normalized_header:
-            best_score = max(best_score, 0.95)
-            continue
-        if not header_tokens:
-            continue
-        if token_overlap:
+            score = 1.0
+        elif alias in normalized_header:
+            score = 0.95
+        else:
             overlap_count = len(header_tokens & alias_tokens)
             coverage = overlap_count / len(alias_tokens)
             header_coverage = overlap_count / len(header_tokens)
             missing_ratio = 1.0 - coverage
-            score = coverage * 0.7 + header_coverage * 0.3 - (missing_ratio * 0.4)
-            best_score = max(best_score, max(score, 0.0))
-    return best_score
+            score = max(coverage * 0.7 + header_coverage * 0.3 - (missing_ratio * 0.4), 0.0)
+        if score > scores.get(field, 0.0):
+            scores[field] = score
+    return scores
 
 
 def _detect_csv_delimiter(sample_text: str) -> str:
-    sample_lines = sample_text.splitlines()[:50]
-    sample = "\n".join(sample_lines)
-    sniffer = csv.Sniffer()
-    counters = Counter({
-        ",": sample.count(","),
-        ";": sample.count(";"),
-        "\t": sample.count("\t"),
-        "|": sample.count("|"),
-    })
+    # Table-uniformity heuristic: the real delimiter appears a similar number of
+    # times on every line, so favour high per-line counts with low variance.
+    sample_lines = [line for line in sample_text.split("\n", 50)[:50] if line.strip()]
+    if not sample_lines:
+        return ","
+    line_count = len(sample_lines)
+    scores: Dict[str, float] = {}
+    for delimiter in CSV_DELIMITER_CANDIDATES:
+        # Usually only one candidate occurs at all; the rest skip the per-line statistics.
+        if not any(delimiter in line for line in sample_lines):
+            scores[delimiter] = 0.0
+            continue
+        counts = [line.count(delimiter) for line in sample_lines]
+        mean = sum(counts) / line_count
+        variance = sum((count - mean) ** 2 for count in counts) / line_count
+        scores[delimiter] = mean / (1.0 + variance)
+    best_score = max(scores.values())
+    if best_score == 0.0:
+        return ","
+    tied = [delimiter for delimiter, score in scores.items() if score == best_score]
+    if len(tied) == 1:
+        return tied[0]
     try:
-        dialect = sniffer.sniff(sample, delimiters=",;|\t")
-        candidate = dialect.delimiter
+        return csv.Sniffer().sniff("\n".join(sample_lines), delimiters="".join(tied)).delimiter
     except csv.Error:
-        candidate = None
-    if candidate:
-        if candidate == ",":
-            semicolons = counters[";"]
-            commas = counters[","]
-            if semicolons >= max(1, len(sample_lines)) and semicolons >= commas / 1.2:
-                return ";"
-        return candidate
-    delimiter, occurrences = counters.most_common(1)[0]
-    if occurrences == 0:
-        return ","
-    return delimiter
+        return tied[0]
+
+
+def _clean_fieldname(raw: str) -> str:
+    cleaned = raw.strip().lstrip("\ufeff")
+    if cleaned.startswith('"') and cleaned.endswith('"') and len(cleaned) > 1:
+        cleaned = cleaned[1:-1]
+    if cleaned.startswith("'") and cleaned.endswith("'") and len(cleaned) > 1:
+        cleaned = cleaned[1:-1]
+    return cleaned
 
 
 def _sanitize_fieldnames(fieldnames: List[str]) -> Tuple[List[str], Dict[str, str]]:
     sanitized: List[str] = []
     display_map: Dict[str, str] = {}
-    counts: Dict[str, int] = {}
+    counts: Counter[str] = Counter()
     for raw in fieldnames:
         if raw is None:
             continue
-        cleaned = raw.strip().lstrip("\ufeff")
-        if cleaned.startswith('"') and cleaned.endswith('"') and len(cleaned) > 1:
-            cleaned = cleaned[1:-1]
-        if cleaned.startswith("'") and cleaned.endswith("'") and len(cleaned) > 1:
-            cleaned = cleaned[1:-1]
+        cleaned = _clean_fieldname(raw)
         if not cleaned:
             continue
-        count = counts.get(cleaned, 0)
+        count = counts[cleaned]
         alias = cleaned if count == 0 else f"{cleaned}__{count}"
-        counts[cleaned] = count + 1
+        counts[cleaned] += 1
         sanitized.append(alias)
         display_map[alias] = cleaned
     return sanitized, display_map
@@ -398,7 +497,7 @@ def _detect_number_format(raw_rows: List[List[str]]) -> Dict[str, Optional[str]]
             candidate = cell.strip()
             if not candidate or len(candidate) < 3:
                 continue
-            if re.search(r"[a-zA-Z]", candidate):
+            if _RE_ASCII_ALPHA.search(candidate):
                 continue
             sample_values.append(candidate)
         if len(sample_values) >= 200:
@@ -418,9 +517,9 @@ def _detect_number_format(raw_rows: List[List[str]]) -> Dict[str, Optional[str]]
             if "," in value[:last_dot]:
                 thousand_counts[","] += 1
         else:
-            if "," in value and re.search(r"\d,\d", value):
+            if "," in value and _RE_COMMA_DECIMAL.search(value):
                 decimal_counts[","] += 1
-            elif "." in value and re.search(r"\d\.\d", value):
+            elif "." in value and _RE_DOT_DECIMAL.search(value):
                 decimal_counts["."] += 1
 
     decimal_sep: Optional[str] = None
@@ -436,7 +535,11 @@ def _detect_number_format(raw_rows: List[List[str]]) -> Dict[str, Optional[str]]
 
 
 def _contains_alpha(value: str) -> bool:
-    return any(char.isalpha() for char in value)
+    # Outside ASCII, regex word classes also match numerals such as "½" or "²",
+    # which str.isalpha() rejects.
+    if value.isascii():
+        return _RE_HAS_ALPHA.search(value) is not None
+    return any(ch.isalpha() for ch in value)
 
 
 def _looks_numeric(value: str) -> bool:
@@ -445,7 +548,7 @@ def _looks_numeric(value: str) -> bool:
     cleaned = str(value).strip()
     if not cleaned:
         return False
-    cleaned = re.sub(r"[.\s]", "", cleaned.replace(",", "").replace("-", ""))
+    cleaned = _RE_DOT_OR_SPACE.sub("", cleaned.replace(",", "").replace("-", ""))
     return cleaned.isdigit()
 
 
@@ -455,27 +558,18 @@ def _is_data_like_row(row: List[str]) -> bool:
     numeric_cells = sum(1 for cell in row if _looks_numeric(cell))
     if numeric_cells / max(len(row), 1) >= 0.5:
         return True
-    long_digit = any(len(re.sub(r"\D", "", cell)) >= 10 for cell in row if isinstance(cell, str))
+    long_digit = any(len(_RE_NON_DIGIT.sub("", cell)) >= 10 for cell in row if isinstance(cell, str))
     return long_digit
 
 
 def _detect_header_row_index(rows: List[List[str]]) -> Optional[int]:
     if not rows:
         return None
-    sample_lines = [";".join(row) for row in rows[:20]]
-    sniffer = csv.Sniffer()
-    try:
-        if sniffer.has_header("\n".join(sample_lines)):
-            if len(rows) > 1 and _is_data_like_row(rows[0]) and _is_data_like_row(rows[1]):
-                pass
-            else:
-                return 0
-    except csv.Error:
-        pass
-
+    # The row scores below already weigh alpha, numeric and uniqueness ratios, which
+    # is the signal csv.Sniffer.has_header re-derived by re-parsing the sample.
     best_idx: Optional[int] = None
     best_score = 0.0
-    for idx, row in enumerate(rows[:5]):
+    for idx, row in enumerate(rows[:HEADER_SEARCH_ROWS]):
         if not row:
             continue
         total = len(row)
@@ -502,7 +596,16 @@ def _generate_synthetic_headers(width: int) -> List[str]:
 
 
 def _decode_csv_bytes(data: bytes) -> Tuple[str, str]:
-    encodings = ["utf-8-sig", "utf-16", "utf-8", "cp1252", "latin-1"]
+    # Only a BOM can make utf-8-sig/utf-16 the right answer, so sniff it instead
+    # of attempting (and failing) full decodes of the whole payload.
+    if data.startswith(codecs.BOM_UTF8):
+        encodings = ["utf-8-sig", "cp1252", "latin-1"]
+    elif data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encodings = ["utf-16", "cp1252", "latin-1"]
+    elif data.isascii():
+        return data.decode("ascii"), "utf-8"
+    else:
+        encodings = ["utf-8", "cp1252", "latin-1"]
     for encoding in encodings:
         try:
             return data.decode(encoding), encoding
@@ -512,7 +615,73 @@ def _decode_csv_bytes(data: bytes) -> Tuple[str, str]:
     return data.decode("utf-8", errors="ignore"), "utf-8"
 
 
+def _iter_text_lines(text: str, block_size: int = CSV_READ_BLOCK_SIZE) -> Iterator[str]:
+    # io.StringIO keeps a 4-byte-per-character copy of its whole input; wrapping
+    # newline-aligned blocks instead bounds that copy to one block at a time.
+    start = 0
+    length = len(text)
+    while start < length:
+        cut = text.find("\n", start + block_size)
+        stop = length if cut < 0 else cut + 1
+        yield from io.StringIO(text[start:stop])
+        start = stop
+
+
+def _csv_stream_encodings(handle: IO[bytes]) -> List[str]:
+    # Streaming counterpart of _decode_csv_bytes: the same candidate order, minus those
+    # a bounded prefix already rules out. The last candidate is always latin-1, which
+    # maps every byte. ASCII input decodes as utf-8 and is reported as such either way.
+    sniff_bytes = max(CSV_ENCODING_SNIFF_BYTES, len(codecs.BOM_UTF8))
+    prefix = handle.read(sniff_bytes)
+    handle.seek(0)
+    if prefix.startswith(codecs.BOM_UTF8):
+        encodings = ["utf-8-sig", "cp1252", "latin-1"]
+    elif prefix.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        encodings = ["utf-16", "cp1252", "latin-1"]
+    else:
+        encodings = ["utf-8", "cp1252", "latin-1"]
+    # A short prefix is the whole payload; otherwise a character may straddle the cut.
+    final = len(prefix) < sniff_bytes
+    viable: List[str] = []
+    for encoding in encodings[:-1]:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(prefix, final=final)
+        except UnicodeDecodeError:
+            continue
+        viable.append(encoding)
+    viable.append(encodings[-1])
+    return viable
+
+
+def _read_csv_stream(handle: IO[bytes]) -> Tuple[List[Dict[str, str]], Dict[str, str], Dict[str, object]]:
+    # The handle must be seekable (files, ZipExtFile). It is decoded while it is parsed,
+    # and rewound only when a candidate encoding fails beyond the sniffed prefix.
+    encodings = _csv_stream_encodings(handle)
+    for encoding in encodings[:-1]:
+        # newline=None applies the same \r\n / \r normalisation _read_csv_rows does on text.
+        text_stream = io.TextIOWrapper(handle, encoding=encoding, newline=None)
+        try:
+            return _read_csv_lines(text_stream, detected_encoding=encoding)
+        except UnicodeDecodeError:
+            pass
+        finally:
+            text_stream.detach()
+        handle.seek(0)
+    text_stream = io.TextIOWrapper(handle, encoding=encodings[-1], newline=None)
+    try:
+        return _read_csv_lines(text_stream, detected_encoding=encodings[-1])
+    finally:
+        text_stream.detach()
+
+
 def _read_csv_rows(text: str, *, detected_encoding: Optional[str] = None) -> Tuple[List[Dict[str, str]], Dict[str, str], Dict[str, object]]:
+    normalized_text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return _read_csv_lines(_iter_text_lines(normalized_text), detected_encoding=detected_encoding)
+
+
+def _read_csv_lines(
+    lines: Iterable[str], *, detected_encoding: Optional[str] = None
+) -> Tuple[List[Dict[str, str]], Dict[str, str], Dict[str, object]]:
     base_meta = {
         "encoding": detected_encoding,
         "delimiter": ",",
@@ -525,13 +694,13 @@ def _read_csv_rows(text: str, *, detected_encoding: Optional[str] = None) -> Tup
         "decimal": None,
         "thousands": None,
     }
-    if not text:
-        return [], {}, base_meta
-
-    normalized_text = text.replace("\r\n", "\n").replace("\r", "\n").lstrip("\ufeff")
-    delimiter = _detect_csv_delimiter(normalized_text)
-    buffer = io.StringIO(normalized_text)
-    csv_reader = csv.reader(buffer, delimiter=delimiter, quotechar='"', skipinitialspace=True, doublequote=True)
+    line_iter = iter(lines)
+    # The delimiter is sniffed from the first 50 lines; they are replayed to the reader.
+    head = list(islice(line_iter, 50))
+    if head:
+        head[0] = head[0].lstrip("\ufeff")
+    delimiter = _detect_csv_delimiter("".join(head))
+    csv_reader = csv.reader(chain(head, line_iter), delimiter=delimiter, quotechar='"', skipinitialspace=True, doublequote=True)
 
     raw_rows: List[List[str]] = []
     for row in csv_reader:
@@ -551,25 +720,33 @@ def _read_csv_rows(text: str, *, detected_encoding: Optional[str] = None) -> Tup
         meta.update({"delimiter": delimiter})
         return [], {}, meta
 
+    total_rows_read = len(raw_rows)
     header_idx = _detect_header_row_index(raw_rows)
     if header_idx is None:
         header = _generate_synthetic_headers(max(len(row) for row in raw_rows))
-        data_rows = raw_rows
         metadata_rows = 0
     else:
         header = raw_rows[header_idx]
-        data_rows = raw_rows[header_idx + 1 :]
+        # What remains of raw_rows from here on are the data rows.
+        del raw_rows[: header_idx + 1]
         metadata_rows = header_idx
 
     sanitized_fieldnames, display_map = _sanitize_fieldnames(header)
     if not sanitized_fieldnames:
-        width = max(len(row) for row in data_rows) if data_rows else len(header)
+        width = max(len(row) for row in raw_rows) if raw_rows else len(header)
         header = _generate_synthetic_headers(width)
         sanitized_fieldnames, display_map = _sanitize_fieldnames(header)
 
+    # Sampled from the leading rows, before they are consumed below.
+    number_format = _detect_number_format(raw_rows)
+
     column_count = len(sanitized_fieldnames)
     rows: List[Dict[str, str]] = []
-    for raw_row in data_rows:
+    # Pop the raw cell lists as their dicts are built, so the two copies of the
+    # table never coexist in full.
+    raw_rows.reverse()
+    while raw_rows:
+        raw_row = raw_rows.pop()
         if not raw_row:
             continue
         normalized_row = list(raw_row)
@@ -578,17 +755,13 @@ def _read_csv_rows(text: str, *, detected_encoding: Optional[str] = None) -> Tup
         elif len(normalized_row) > column_count:
             normalized_row = normalized_row[:column_count]
 
-        row_dict: Dict[str, str] = {}
-        for field, value in zip(sanitized_fieldnames, normalized_row):
-            if isinstance(value, str):
-                cleaned_value = _strip_outer_quotes(value.strip())
-            else:
-                cleaned_value = value
-            row_dict[field] = cleaned_value
-        if any((isinstance(val, str) and val) or val not in (None, "") for val in row_dict.values()):
-            rows.append(row_dict)
+        # _strip_outer_quotes strips whitespace itself and passes non-strings through.
+        cleaned_values = [_strip_outer_quotes(value) for value in normalized_row]
+        # csv.reader only yields strings, so blank rows are exactly the all-falsy ones;
+        # they are dropped before a dict is built for them.
+        if any(cleaned_values):
+            rows.append(dict(zip(sanitized_fieldnames, cleaned_values)))
 
-    number_format = _detect_number_format(data_rows)
     meta = {
         "encoding": detected_encoding,
         "delimiter": delimiter,
@@ -596,7 +769,7 @@ def _read_csv_rows(text: str, *, detected_encoding: Optional[str] = None) -> Tup
         "synthetic_header": header_idx is None,
         "metadata_rows": metadata_rows,
         "column_count": column_count,
-        "total_rows_read": len(raw_rows),
+        "total_rows_read": total_rows_read,
         "data_rows": len(rows),
         "decimal": number_format.get("decimal"),
         "thousands": number_format.get("thousands"),
@@ -604,23 +777,34 @@ def _read_csv_rows(text: str, *, detected_encoding: Optional[str] = None) -> Tup
     return rows, display_map, meta
 
 
+def _register_column_alias(key: str, counts: Counter[str], display_map: Dict[str, str]) -> Optional[str]:
+    cleaned = _clean_fieldname(key)
+    if not cleaned:
+        return None
+    count = counts[cleaned]
+    alias = cleaned if count == 0 else f"{cleaned}__{count}"
+    counts[cleaned] += 1
+    display_map[alias] = cleaned
+    return alias
+
+
 def _prepare_generic_rows(rows: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], Dict[str, str]]:
     if not rows:
         return [], {}
-    ordered_columns: List[str] = []
-    for row in rows:
-        for key in row.keys():
-            if key and key not in ordered_columns:
-                ordered_columns.append(key)
-    sanitized, display_map = _sanitize_fieldnames(ordered_columns)
-    key_map = {orig: alias for orig, alias in zip(ordered_columns, sanitized)}
+    display_map: Dict[str, str] = {}
+    key_map: Dict[str, Optional[str]] = {}
+    counts: Counter[str] = Counter()
     normalized_rows: List[Dict[str, str]] = []
     for row in rows:
         normalized_row: Dict[str, str] = {}
         for key, value in row.items():
-            if key not in key_map:
+            if not key:
                 continue
+            if key not in key_map:
+                key_map[key] = _register_column_alias(key, counts, display_map)
             alias = key_map[key]
+            if alias is None:
+                continue
             if isinstance(value, str):
                 value = value.strip()
             normalized_row[alias] = value
@@ -628,145 +812,191 @@ def _prepare_generic_rows(rows: List[Dict[str, str]]) -> Tuple[List[Dict[str, st
     return normalized_rows, display_map
 
 
+def _prepare_generic_table(header: List[str], rows: List[List[str]]) -> Tuple[List[Dict[str, str]], Dict[str, str]]:
+    """Equivalent to ``_prepare_generic_rows`` over ``dict(zip(header, row))`` rows, without building them."""
+    # Repeated header cells keep their first position in the key order but the last cell's value.
+    positions: Dict[str, int] = {}
+    for position, key in enumerate(header):
+        if key:
+            positions[key] = position
+    display_map: Dict[str, str] = {}
+    counts: Counter[str] = Counter()
+    columns: List[Tuple[str, int]] = []
+    for key, position in positions.items():
+        alias = _register_column_alias(key, counts, display_map)
+        if alias is not None:
+            columns.append((alias, position))
+    normalized_rows = [{alias: cells[position].strip() for alias, position in columns} for cells in rows]
+    return normalized_rows, display_map
+
+
+# Fiscal amounts repeat heavily across rows and notes ("0.00", "18.00", ...).
+_parse_float_text = lru_cache(maxsize=8192)(parse_safe_float)
+
+
+def _to_float(value: object) -> float:
+    if isinstance(value, str):
+        return _parse_float_text(value)
+    return parse_safe_float(value)
+
+
 def _digits(value: Optional[str]) -> str:
     if not value:
         return ""
+    if value.isascii() or max(value) <= "\xff":
+        return value.translate(_LATIN1_NON_DIGITS)
     return "".join(ch for ch in value if ch.isdigit())
 
 
-def _score_numeric_column(values: List[Optional[str]], header: str) -> float:
-    numeric = 0
-    total = 0
-    for value in values:
-        if value in (None, ""):
+@dataclass(slots=True)
+class _ColumnProfile:
+    row_count: int = 0
+    non_blank: int = 0
+    non_empty: int = 0
+    numeric: int = 0
+    nonzero_amounts: int = 0
+    bounded_amounts: int = 0
+    decimal_hints: int = 0
+    dates: int = 0
+    cfop_like: int = 0
+    ncm_like: int = 0
+    cnpj_like: int = 0
+    access_key_like: int = 0
+    uf: int = 0
+
+    def ratio(self, hits: int) -> float:
+        if self.non_empty == 0:
+            return 0.0
+        return hits / self.non_empty
+
+
+def _profile_column(values: Iterable[Optional[str]]) -> _ColumnProfile:
+    """Collects every value-based signal used by the column scorers in a single pass."""
+    values = list(values)
+    # Fiscal columns (UF, CFOP, NCM, CNPJ) repeat a handful of values, so each
+    # distinct value is classified once and weighted by its frequency.
+    try:
+        tallies: Iterable[Tuple[Optional[str], int]] = Counter(values).items()
+    except TypeError:
+        tallies = [(value, 1) for value in values]
+    row_count = len(values)
+    non_blank = non_empty = numeric = nonzero_amounts = bounded_amounts = decimal_hints = 0
+    dates = cfop_like = ncm_like = cnpj_like = access_key_like = uf = 0
+    for value, count in tallies:
+        if value is None or value == "":
             continue
-        total += 1
-        parsed = parse_safe_float(value)
-        if parsed != 0.0 or (isinstance(value, str) and any(ch.isdigit() for ch in value)):
-            numeric += 1
-    if total == 0:
-        return 0.0
-    base_score = numeric / total
+        non_blank += count
+        # Numeric zeros from JSON/XLSX rows only weigh on the numeric scorer.
+        if not value:
+            continue
+        non_empty += count
+        is_text = isinstance(value, str)
+        digit_count = len(_digits(value if is_text else str(value)))
+        parsed = _to_float(value)
+        if parsed != 0.0:
+            nonzero_amounts += count
+            if 1e-6 < abs(parsed) < 1e11:
+                bounded_amounts += count
+        if parsed != 0.0 or (is_text and digit_count):
+            numeric += count
+        if digit_count == 4:
+            cfop_like += count
+        elif digit_count in (8, 10):
+            ncm_like += count
+        elif digit_count in (43, 44, 45):
+            access_key_like += count
+        if digit_count >= 14:
+            cnpj_like += count
+        if not is_text:
+            continue
+        if "," in value or "." in value:
+            decimal_hints += count
+        # Both accepted date layouts need a separator, so most cells skip the regex.
+        if ("/" in value or "-" in value) and _RE_DATE.search(value):
+            dates += count
+        # Already-clean "SP" needs no strip/upper copies.
+        if len(value) == 2 and value in BRAZILIAN_STATES:
+            uf += count
+        else:
+            stripped = value.strip()
+            if len(stripped) == 2 and stripped.upper() in BRAZILIAN_STATES:
+                uf += count
+    return _ColumnProfile(
+        row_count=row_count,
+        non_blank=non_blank,
+        non_empty=non_empty,
+        numeric=numeric,
+        nonzero_amounts=nonzero_amounts,
+        bounded_amounts=bounded_amounts,
+        decimal_hints=decimal_hints,
+        dates=dates,
+        cfop_like=cfop_like,
+        ncm_like=ncm_like,
+        cnpj_like=cnpj_like,
+        access_key_like=access_key_like,
+        uf=uf,
+    )
+
+
+@lru_cache(maxsize=1024)
+def _numeric_header_adjustments(header: str) -> Tuple[float, ...]:
+    # Headers are already normalized and each column is scored with a handful of
+    # suffix variants, so the token scans run once per distinct header string.
     header_lower = header.lower()
+    adjustments: List[float] = []
     if "valor" in header_lower:
-        base_score += 0.2
+        adjustments.append(0.2)
     if "total" in header_lower:
-        base_score += 0.2
+        adjustments.append(0.2)
     if "unit" in header_lower or "unitario" in header_lower or "unidade" in header_lower:
-        base_score += 0.1
+        adjustments.append(0.1)
     if "qtd" in header_lower or "quant" in header_lower:
-        base_score += 0.1
+        adjustments.append(0.1)
     if any(token in header_lower for token in ("modelo", "serie", "natureza", "indicador")):
-        base_score -= 0.3
+        adjustments.append(-0.3)
+    return tuple(adjustments)
+
+
+def _score_numeric_column(profile: _ColumnProfile, header: str) -> float:
+    if profile.non_blank == 0:
+        return 0.0
+    base_score = profile.numeric / profile.non_blank
+    # Applied one by one, in order, so the float result matches the inline checks.
+    for adjustment in _numeric_header_adjustments(header):
+        base_score += adjustment
     return max(0.0, min(base_score, 1.0))
 
 
-def _score_reasonable_amount(values: List[Optional[str]]) -> float:
-    numeric_values: List[float] = []
-    decimal_hint = 0
-    for value in values:
-        if value in (None, ""):
-            continue
-        if isinstance(value, str) and ("," in value or "." in value):
-            decimal_hint += 1
-        parsed = parse_safe_float(value)
-        if parsed != 0.0:
-            numeric_values.append(abs(parsed))
-    if not numeric_values:
+def _score_reasonable_amount(profile: _ColumnProfile) -> float:
+    if profile.nonzero_amounts == 0:
         return 0.0
-    bounded = sum(1 for number in numeric_values if 1e-6 < number < 1e11)
-    bounded_score = bounded / len(numeric_values)
-    decimal_score = decimal_hint / max(len(values), 1)
+    bounded_score = profile.bounded_amounts / profile.nonzero_amounts
+    decimal_score = profile.decimal_hints / max(profile.row_count, 1)
     return min(1.0, bounded_score * 0.7 + decimal_score * 0.3)
 
 
-def _score_date_column(values: List[Optional[str]]) -> float:
-    pattern = re.compile(r"\b(\d{2}/\d{2}/\d{4}|\d{4}-\d{2}-\d{2})\b")
-    matches = 0
-    total = 0
-    for value in values:
-        if not value:
-            continue
-        total += 1
-        if isinstance(value, str) and pattern.search(value):
-            matches += 1
-    if total == 0:
-        return 0.0
-    return matches / total
+def _score_date_column(profile: _ColumnProfile) -> float:
+    return profile.ratio(profile.dates)
 
 
-def _score_cfop_column(values: List[Optional[str]]) -> float:
-    matches = 0
-    total = 0
-    for value in values:
-        if not value:
-            continue
-        total += 1
-        digits = _digits(str(value))
-        if len(digits) == 4:
-            matches += 1
-    if total == 0:
-        return 0.0
-    return matches / total
+def _score_cfop_column(profile: _ColumnProfile) -> float:
+    return profile.ratio(profile.cfop_like)
 
 
-def _score_ncm_column(values: List[Optional[str]]) -> float:
-    matches = 0
-    total = 0
-    for value in values:
-        if not value:
-            continue
-        total += 1
-        digits = _digits(str(value))
-        if len(digits) in {8, 10}:
-            matches += 1
-    if total == 0:
-        return 0.0
-    return matches / total
+def _score_ncm_column(profile: _ColumnProfile) -> float:
+    return profile.ratio(profile.ncm_like)
 
 
-def _score_cnpj_column(values: List[Optional[str]]) -> float:
-    matches = 0
-    total = 0
-    for value in values:
-        if not value:
-            continue
-        total += 1
-        digits = _digits(str(value))
-        if len(digits) >= 14:
-            matches += 1
-    if total == 0:
-        return 0.0
-    return matches / total
+def _score_cnpj_column(profile: _ColumnProfile) -> float:
+    return profile.ratio(profile.cnpj_like)
 
 
-def _score_uf_column(values: List[Optional[str]]) -> float:
-    matches = 0
-    total = 0
-    for value in values:
-        if not value:
-            continue
-        total += 1
-        if isinstance(value, str) and value.strip().upper() in BRAZILIAN_STATES:
-            matches += 1
-    if total == 0:
-        return 0.0
-    return matches / total
+def _score_uf_column(profile: _ColumnProfile) -> float:
+    return profile.ratio(profile.uf)
 
 
-def _score_access_key_column(values: List[Optional[str]]) -> float:
-    matches = 0
-    total = 0
-    for value in values:
-        if not value:
-            continue
-        total += 1
-        digits = _digits(str(value))
-        if len(digits) in {44, 43, 45}:
-            matches += 1
-    if total == 0:
-        return 0.0
-    return matches / total
+def _score_access_key_column(profile: _ColumnProfile) -> float:
+    return profile.ratio(profile.access_key_like)
 
 
 def _infer_column_mapping(
@@ -783,13 +1013,14 @@ def _infer_column_mapping(
     used_columns: set[str] = set()
     reusable_fields = {"valor_total_nfe"}
 
-    for field, aliases in CSV_FIELD_ALIASES.items():
+    header_scores = {column: _score_header_aliases(normalized_headers[column]) for column in columns}
+    for field in CSV_FIELD_ALIASES:
         best_column: Optional[str] = None
         best_score = 0.0
         for column in columns:
             if column in used_columns and field not in reusable_fields:
                 continue
-            score = _score_header_match(normalized_headers.get(column, ""), aliases)
+            score = header_scores[column].get(field, 0.0)
             if score > best_score:
                 best_column = column
                 best_score = score
@@ -803,46 +1034,51 @@ def _infer_column_mapping(
                 "matched_by": "alias",
             }
 
-    def collect_values(column: str) -> List[Optional[str]]:
-        return [row.get(column) for row in rows]
+    profiles: Dict[str, _ColumnProfile] = {}
+
+    def column_profile(column: str) -> _ColumnProfile:
+        profile = profiles.get(column)
+        if profile is None:
+            profile = profiles[column] = _profile_column(row.get(column) for row in rows)
+        return profile
 
     def _header_contains_any(header: str, tokens: Iterable[str]) -> bool:
         return any(token in header for token in tokens)
 
     # Value-driven inference for missing fields
-    inference_rules: Dict[str, Callable[[str, List[Optional[str]]], float]] = {
-        "nfe_id": lambda header, values: (_score_access_key_column(values) * 0.7)
+    inference_rules: Dict[str, Callable[[str, _ColumnProfile], float]] = {
+        "nfe_id": lambda header, profile: (_score_access_key_column(profile) * 0.7)
         + (0.3 if "chave" in header or "nfe" in header else 0.0),
-        "data_emissao": lambda header, values: _score_date_column(values),
-        "valor_total_nfe": lambda header, values: (
-            _score_numeric_column(values, header + " total" if "nota" in header or "nf" in header else header)
-            + (_score_reasonable_amount(values) * 0.6)
-            - (_score_access_key_column(values) * 0.7)
+        "data_emissao": lambda header, profile: _score_date_column(profile),
+        "valor_total_nfe": lambda header, profile: (
+            _score_numeric_column(profile, header + " total" if "nota" in header or "nf" in header else header)
+            + (_score_reasonable_amount(profile) * 0.6)
+            - (_score_access_key_column(profile) * 0.7)
         ),
-        "produto_valor_total": lambda header, values: (
-            _score_numeric_column(values, header + " item")
+        "produto_valor_total": lambda header, profile: (
+            _score_numeric_column(profile, header + " item")
             if (
                 "valor" in header and _header_contains_any(header, ["item", "produto"])
                 or _header_contains_any(header, ["valor item", "valor produto", "total item", "total produto"])
             )
             else 0.0
         ),
-        "produto_valor_unit": lambda header, values: (
-            _score_numeric_column(values, header + " unit")
+        "produto_valor_unit": lambda header, profile: (
+            _score_numeric_column(profile, header + " unit")
             if "valor" in header and _header_contains_any(header, ["unit", "unitario", "unitaria"])
             else 0.0
         ),
-        "produto_qtd": lambda header, values: (
-            _score_numeric_column(values, header + " qtd")
+        "produto_qtd": lambda header, profile: (
+            _score_numeric_column(profile, header + " qtd")
             if _header_contains_any(header, ["quant", "qtd"])
             else 0.0
         ),
-        "produto_cfop": lambda header, values: _score_cfop_column(values) if "cfop" in header else 0.0,
-        "produto_ncm": lambda header, values: _score_ncm_column(values) if "ncm" in header else 0.0,
-        "emitente_cnpj": lambda header, values: _score_cnpj_column(values),
-        "destinatario_cnpj": lambda header, values: _score_cnpj_column(values),
-        "emitente_uf": lambda header, values: _score_uf_column(values),
-        "destinatario_uf": lambda header, values: _score_uf_column(values),
+        "produto_cfop": lambda header, profile: _score_cfop_column(profile) if "cfop" in header else 0.0,
+        "produto_ncm": lambda header, profile: _score_ncm_column(profile) if "ncm" in header else 0.0,
+        "emitente_cnpj": lambda header, profile: _score_cnpj_column(profile),
+        "destinatario_cnpj": lambda header, profile: _score_cnpj_column(profile),
+        "emitente_uf": lambda header, profile: _score_uf_column(profile),
+        "destinatario_uf": lambda header, profile: _score_uf_column(profile),
     }
 
     for field, scorer in inference_rules.items():
@@ -854,8 +1090,7 @@ def _infer_column_mapping(
             if column in used_columns and field not in reusable_fields:
                 continue
             header = normalized_headers.get(column, "")
-            values = collect_values(column)
-            score = scorer(header, values)
+            score = scorer(header, column_profile(column))
             if score > best_score:
                 best_score = score
                 best_column = column
@@ -913,10 +1148,7 @@ def _infer_column_mapping(
 def _is_valid_textual(value: Optional[str]) -> bool:
     if not isinstance(value, str):
         return False
-    stripped = value.strip()
-    if not stripped:
-        return False
-    return any(ch.isalpha() for ch in stripped)
+    return _contains_alpha(value)
 
 
 def _should_ignore_textual_header(header: str) -> bool:
@@ -965,18 +1197,26 @@ def _textual_quality_score(value: str) -> int:
     return alpha_count - digit_penalty
 
 
-def _guess_textual_value(row: Dict[str, str], candidates: List[str], display_map: Dict[str, str]) -> Optional[str]:
+def _textual_candidate_columns(columns: List[str], display_map: Dict[str, str]) -> List[Tuple[str, bool]]:
+    """Returns (column, is_preferred_description) for columns worth probing for a product name."""
+    candidates: List[Tuple[str, bool]] = []
+    for column in columns:
+        header = _normalize_text(display_map.get(column, column))
+        if header and _should_ignore_textual_header(header):
+            continue
+        candidates.append((column, bool(header) and _is_preferred_description_header(header)))
+    return candidates
+
+
+def _guess_textual_value(row: Dict[str, str], candidates: List[Tuple[str, bool]]) -> Optional[str]:
     preferred: List[Tuple[int, str]] = []
     secondary: List[Tuple[int, str]] = []
-    for column in candidates:
+    for column, is_preferred in candidates:
         value = row.get(column)
         if not _is_valid_textual(value):
             continue
-        header = _normalize_text(display_map.get(column, column))
-        if header and _should_ignore_textual_header(header):
-            continue
         score = _textual_quality_score(str(value))
-        if header and _is_preferred_description_header(header):
+        if is_preferred:
             preferred.append((score, str(value)))
         else:
             secondary.append((score, str(value)))
@@ -991,25 +1231,29 @@ def _guess_textual_value(row: Dict[str, str], candidates: List[str], display_map
 
 
 def _aggregate_totals(rows: List[Dict[str, str]], mapping: Dict[str, str]) -> Dict[str, float]:
-    totals: Dict[str, float] = {}
+    totals: Dict[str, float] = defaultdict(float)
     nfe_column = mapping.get("nfe_id")
     item_total_column = mapping.get("produto_valor_total")
     value_total_column = mapping.get("valor_total_nfe")
-    if nfe_column and item_total_column:
+    if not nfe_column:
+        return {}
+    to_float = _to_float
+    # Any row with an nfe_id yields a key in the item pass, so the invoice-total
+    # fallback can only apply when there is no item-total column: one pass either way.
+    if item_total_column:
         for row in rows:
             nfe_id = (row.get(nfe_column) or "").strip()
-            if not nfe_id:
-                continue
-            totals[nfe_id] = totals.get(nfe_id, 0.0) + parse_safe_float(row.get(item_total_column))
-    if not totals and nfe_column and value_total_column:
+            if nfe_id:
+                totals[nfe_id] += to_float(row.get(item_total_column))
+    elif value_total_column:
         for row in rows:
             nfe_id = (row.get(nfe_column) or "").strip()
             if not nfe_id:
                 continue
-            value = parse_safe_float(row.get(value_total_column))
+            value = to_float(row.get(value_total_column))
             if value:
-                totals[nfe_id] = max(totals.get(nfe_id, 0.0), value)
-    return totals
+                totals[nfe_id] = max(totals[nfe_id], value)
+    return dict(totals)
 
 
 def _parse_any_date(value: str) -> Optional[date]:
@@ -1019,17 +1263,27 @@ def _parse_any_date(value: str) -> Optional[date]:
     if not cleaned:
         return None
     normalized = cleaned.replace("T", " ").replace("Z", "").strip()
+    candidate = normalized.split(" ")[0]
+    # Brazilian DD/MM/YYYY is the common non-ISO layout; build it directly instead of
+    # walking the strptime chain (fromisoformat never accepts a slash).
+    if len(candidate) == 10 and candidate[2] == "/" and candidate[5] == "/":
+        day, month, year = candidate[:2], candidate[3:5], candidate[6:]
+        digits = day + month + year
+        if digits.isascii() and digits.isdigit():
+            try:
+                return date(int(year), int(month), int(day))
+            except ValueError:
+                pass
     try:
         return datetime.fromisoformat(normalized).date()
     except ValueError:
         pass
-    candidate = normalized.split(" ")[0]
     for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%d.%m.%Y"):
         try:
             return datetime.strptime(candidate, fmt).date()
         except ValueError:
             continue
-    digits_only = re.sub(r"\D", "", cleaned)
+    digits_only = _RE_NON_DIGIT.sub("", cleaned)
     if len(digits_only) == 8:
         for fmt in ("%Y%m%d", "%d%m%Y"):
             try:
@@ -1051,48 +1305,76 @@ class _SemanticAnalyzer:
         self.category_weighted_totals: Dict[str, Dict[str, float]] = {
             field: defaultdict(float) for field in VALUE_WEIGHTED_FIELDS
         }
+        # ISO date -> weight; the sorted key range is the temporal coverage.
         self.timeline_totals: Dict[str, float] = defaultdict(float)
-        self.date_values: List[date] = []
         self.sample_records: List[Dict[str, object]] = []
+        # Per-field targets resolved once instead of per observed row.
+        self._category_targets: List[Tuple[str, Counter[str], Optional[Dict[str, float]]]] = [
+            (field, self.category_counts[field], self.category_weighted_totals.get(field))
+            for field in CATEGORICAL_FIELDS
+        ]
+        # Emission dates repeat across the items of a note; parse each string once.
+        self._date_cache: Dict[str, Optional[str]] = {}
 
     def observe(self, entry: Dict[str, object]) -> None:
-        self.row_count += 1
-        if len(self.sample_records) < 3:
+        self.observe_many([entry])
+
+    def observe_many(self, entries: List[Dict[str, object]]) -> None:
+        # Field-at-a-time over the batch: category tallies become one C-level
+        # Counter.update per field, with the same first-seen ordering as row-at-a-time.
+        if not entries:
+            return
+        self.row_count += len(entries)
+        for entry in entries[: max(0, 3 - len(self.sample_records))]:
             self.sample_records.append({key: entry.get(key) for key in entry})
 
-        default_weight = entry.get("produto_valor_total") or entry.get("valor_total_nfe") or 0.0
-        weight = parse_safe_float(default_weight)
+        weights = [
+            _to_float(entry.get("produto_valor_total") or entry.get("valor_total_nfe") or 0.0) for entry in entries
+        ]
 
+        numeric_totals = self.numeric_totals
+        numeric_min = self.numeric_min
+        numeric_max = self.numeric_max
         for field in NUMERIC_FIELDS:
-            value = entry.get(field)
-            if value in (None, ""):
+            values = [_to_float(value) for value in (entry.get(field) for entry in entries) if value not in (None, "")]
+            if not values:
                 continue
-            numeric_value = parse_safe_float(value)
-            self.numeric_totals[field] += numeric_value
-            current_min = self.numeric_min.get(field)
-            if current_min is None or numeric_value < current_min:
-                self.numeric_min[field] = numeric_value
-            current_max = self.numeric_max.get(field)
-            if current_max is None or numeric_value > current_max:
-                self.numeric_max[field] = numeric_value
-
-        for field in CATEGORICAL_FIELDS:
-            raw_value = entry.get(field)
-            if not raw_value:
-                continue
-            label = str(raw_value)
-            self.category_counts[field][label] += 1
-            if field in self.category_weighted_totals:
-                self.category_weighted_totals[field][label] += weight
-
+            total = numeric_totals[field]
+            for numeric_value in values:
+                total += numeric_value
+            numeric_totals[field] = total
+            batch_min = min(values)
+            current_min = numeric_min.get(field)
+            if current_min is None or batch_min < current_min:
+                numeric_min[field] = batch_min
+            batch_max = max(values)
+            current_max = numeric_max.get(field)
+            if current_max is None or batch_max > current_max:
+                numeric_max[field] = batch_max
+
+        for field, counts, weighted_totals in self._category_targets:
+            raw_values = [entry.get(field) for entry in entries]
+            counts.update(map(str, filter(None, raw_values)))
+            if weighted_totals is not None:
+                for raw_value, weight in zip(raw_values, weights):
+                    if raw_value:
+                        weighted_totals[str(raw_value)] += weight
+
+        date_cache = self._date_cache
+        timeline_totals = self.timeline_totals
         for field in DATE_FIELDS:
-            date_value = entry.get(field)
-            if not date_value:
-                continue
-            parsed = _parse_any_date(str(date_value))
-            if parsed:
-                self.date_values.append(parsed)
-                self.timeline_totals[parsed.isoformat()] += weight
+            for entry, weight in zip(entries, weights):
+                date_value = entry.get(field)
+                if not date_value:
+                    continue
+                date_text = str(date_value)
+                if date_text in date_cache:
+                    iso_date = date_cache[date_text]
+                else:
+                    parsed = _parse_any_date(date_text)
+                    iso_date = date_cache[date_text] = parsed.isoformat() if parsed else None
+                if iso_date:
+                    timeline_totals[iso_date] += weight
 
     def _top_categories(self, field: str) -> List[Dict[str, object]]:
         counter = self.category_counts.get(field)
@@ -1104,7 +1386,7 @@ class _SemanticAnalyzer:
         totals = self.category_weighted_totals.get(field)
         if not totals:
             return []
-        sorted_totals = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:MAX_CHART_ITEMS]
+        sorted_totals = heapq.nlargest(MAX_CHART_ITEMS, totals.items(), key=itemgetter(1))
         return [{"label": label, "value": round(value, 2)} for label, value in sorted_totals]
 
     def finalize(self) -> Dict[str, object]:
@@ -1129,6 +1411,9 @@ class _SemanticAnalyzer:
             if self.category_weighted_totals.get(field)
         }
 
+        # ISO date keys sort chronologically; one ordering serves the chart, trend and coverage.
+        ordered_timeline = sorted(self.timeline_totals.items())
+
         visualizations: List[Dict[str, object]] = []
         top_products = value_distribution.get("produto_nome") or []
         if top_products:
@@ -1154,17 +1439,6 @@ class _SemanticAnalyzer:
                     "metric": "valor_total_nfe",
                 }
             )
-        if len(self.timeline_totals) >= 2:
-            ordered_timeline = sorted(self.timeline_totals.items())
-            visualizations.append(
-                {
-                    "type": "line",
-                    "title": "Evolução Temporal do Valor",
-                    "labels": [label for label, _ in ordered_timeline],
-                    "values": [round(value, 2) for _, value in ordered_timeline],
-                    "metric": "valor_total",
-                }
-            )
 
         insights: List[str] = []
         if top_emitentes:
@@ -1185,26 +1459,35 @@ class _SemanticAnalyzer:
                     insights.append(
                         f"O produto {leader['label']} representa {share:.0%} do valor movimentado em produtos/serviços."
                     )
-        if len(self.timeline_totals) >= 2:
-            ordered = sorted(self.timeline_totals.items())
-            first_value = ordered[0][1]
-            last_value = ordered[-1][1]
+        # The line chart and the trend insight are both the last entries of their lists.
+        if len(ordered_timeline) >= 2:
+            visualizations.append(
+                {
+                    "type": "line",
+                    "title": "Evolução Temporal do Valor",
+                    "labels": [label for label, _ in ordered_timeline],
+                    "values": [round(value, 2) for _, value in ordered_timeline],
+                    "metric": "valor_total",
+                }
+            )
+            start_label, first_value = ordered_timeline[0]
+            end_label, last_value = ordered_timeline[-1]
             if first_value:
                 variation = (last_value - first_value) / first_value
                 if variation >= 0.15:
                     insights.append(
-                        f"Há tendência de alta de {variation:.0%} no valor total entre {ordered[0][0]} e {ordered[-1][0]}."
+                        f"Há tendência de alta de {variation:.0%} no valor total entre {start_label} e {end_label}."
                     )
                 elif variation <= -0.15:
                     insights.append(
-                        f"Há tendência de queda de {abs(variation):.0%} no valor total entre {ordered[0][0]} e {ordered[-1][0]}."
+                        f"Há tendência de queda de {abs(variation):.0%} no valor total entre {start_label} e {end_label}."
                     )
 
         temporal_coverage = None
-        if self.date_values:
+        if ordered_timeline:
             temporal_coverage = {
-                "start": min(self.date_values).isoformat(),
-                "end": max(self.date_values).isoformat(),
+                "start": ordered_timeline[0][0],
+                "end": ordered_timeline[-1][0],
             }
 
         semantic_summary = {
@@ -1256,51 +1539,102 @@ def _convert_tabular_rows(
 
     mapping, diagnostics = _infer_column_mapping(rows, display_map)
     totals_by_nfe = _aggregate_totals(rows, mapping)
-    columns = list(display_map.keys())
-    unused_columns = [display_map.get(column, column) for column in columns if column not in mapping.values()]
+    mapped_columns = set(mapping.values())
+    unmapped_columns = [column for column in display_map if column not in mapped_columns]
+    unused_columns = [display_map.get(column, column) for column in unmapped_columns]
     detection_confidence = {field: info["score"] for field, info in diagnostics.items()}
 
     analyzer = _SemanticAnalyzer(display_map, mapping)
     result: List[Dict[str, object]] = []
-    textual_candidates = [column for column in columns if column not in mapping.values()]
+    textual_candidates = _textual_candidate_columns(unmapped_columns, display_map)
     has_item_total_field = "produto_valor_total" in mapping
     has_item_unit_field = "produto_valor_unit" in mapping
     has_item_qty_field = "produto_qtd" in mapping
 
+    col_nfe_id = mapping.get("nfe_id", "")
+    col_data_emissao = mapping.get("data_emissao", "")
+    col_valor_total_nfe = mapping.get("valor_total_nfe", "")
+    col_emitente_nome = mapping.get("emitente_nome", "")
+    col_emitente_cnpj = mapping.get("emitente_cnpj", "")
+    col_emitente_uf = mapping.get("emitente_uf", "")
+    col_destinatario_nome = mapping.get("destinatario_nome", "")
+    col_destinatario_cnpj = mapping.get("destinatario_cnpj", "")
+    col_destinatario_uf = mapping.get("destinatario_uf", "")
+    col_produto_nome = mapping.get("produto_nome", "")
+    col_produto_ncm = mapping.get("produto_ncm", "")
+    col_produto_cfop = mapping.get("produto_cfop", "")
+    col_produto_cst_icms = mapping.get("produto_cst_icms", "")
+    col_produto_base_calculo_icms = mapping.get("produto_base_calculo_icms", "")
+    col_produto_aliquota_icms = mapping.get("produto_aliquota_icms", "")
+    col_produto_valor_icms = mapping.get("produto_valor_icms", "")
+    col_produto_cst_pis = mapping.get("produto_cst_pis", "")
+    col_produto_valor_pis = mapping.get("produto_valor_pis", "")
+    col_produto_cst_cofins = mapping.get("produto_cst_cofins", "")
+    col_produto_valor_cofins = mapping.get("produto_valor_cofins", "")
+    col_produto_valor_iss = mapping.get("produto_valor_iss", "")
+    col_produto_qtd = mapping.get("produto_qtd", "")
+    col_produto_valor_unit = mapping.get("produto_valor_unit", "")
+    col_produto_valor_total = mapping.get("produto_valor_total", "")
+    total_shares_nfe_column = mapping.get("valor_total_nfe") == mapping.get("nfe_id")
+    # Numeric CSV columns repeat the same strings ("0,00", "1,00", ...) heavily,
+    # so parsed values are memoized per raw string for the lifetime of the table.
+    float_cache: Dict[str, float] = {}
+
+    def _psf(value: Optional[str]) -> float:
+        if not value:
+            return 0.0
+        parsed = float_cache.get(value)
+        if parsed is None:
+            parsed = float_cache[value] = _parse_float_text(value)
+        return parsed
+
+    # The issuer (and often the recipient) CNPJ is identical on every item row.
+    mask_cache: Dict[str, Optional[str]] = {}
+
+    def _mask(value: Optional[str]) -> Optional[str]:
+        if not value:
+            return value
+        masked = mask_cache.get(value)
+        if masked is None:
+            masked = mask_cache[value] = _mask_cnpj(value)
+        return masked
+
     for row in rows:
+        get = row.get
         entry: Dict[str, object] = {
-            "nfe_id": (row.get(mapping.get("nfe_id", "")) or None),
-            "data_emissao": (row.get(mapping.get("data_emissao", "")) or None),
-            "valor_total_nfe": parse_safe_float(row.get(mapping.get("valor_total_nfe", ""))),
-            "emitente_nome": row.get(mapping.get("emitente_nome", "")) or None,
-            "emitente_cnpj": _mask_cnpj(row.get(mapping.get("emitente_cnpj", ""))),
-            "emitente_uf": (row.get(mapping.get("emitente_uf", "")) or None),
-            "destinatario_nome": row.get(mapping.get("destinatario_nome", "")) or None,
-            "destinatario_cnpj": _mask_cnpj(row.get(mapping.get("destinatario_cnpj", ""))),
-            "destinatario_uf": (row.get(mapping.get("destinatario_uf", "")) or None),
-            "produto_nome": row.get(mapping.get("produto_nome", "")) or None,
-            "produto_ncm": row.get(mapping.get("produto_ncm", "")) or None,
-            "produto_cfop": row.get(mapping.get("produto_cfop", "")) or None,
-            "produto_cst_icms": row.get(mapping.get("produto_cst_icms", "")) or None,
-            "produto_base_calculo_icms": parse_safe_float(row.get(mapping.get("produto_base_calculo_icms", ""))),
-            "produto_aliquota_icms": parse_safe_float(row.get(mapping.get("produto_aliquota_icms", ""))),
-            "produto_valor_icms": parse_safe_float(row.get(mapping.get("produto_valor_icms", ""))),
-            "produto_cst_pis": row.get(mapping.get("produto_cst_pis", "")) or None,
-            "produto_valor_pis": parse_safe_float(row.get(mapping.get("produto_valor_pis", ""))),
-            "produto_cst_cofins": row.get(mapping.get("produto_cst_cofins", "")) or None,
-            "produto_valor_cofins": parse_safe_float(row.get(mapping.get("produto_valor_cofins", ""))),
-            "produto_valor_iss": parse_safe_float(row.get(mapping.get("produto_valor_iss", ""))),
-            "produto_qtd": parse_safe_float(row.get(mapping.get("produto_qtd", ""))),
-            "produto_valor_unit": parse_safe_float(row.get(mapping.get("produto_valor_unit", ""))),
-            "produto_valor_total": parse_safe_float(row.get(mapping.get("produto_valor_total", ""))),
+            "nfe_id": (get(col_nfe_id) or None),
+            "data_emissao": (get(col_data_emissao) or None),
+            "valor_total_nfe": _psf(get(col_valor_total_nfe)),
+            "emitente_nome": get(col_emitente_nome) or None,
+            "emitente_cnpj": _mask(get(col_emitente_cnpj)),
+            "emitente_uf": (get(col_emitente_uf) or None),
+            "destinatario_nome": get(col_destinatario_nome) or None,
+            "destinatario_cnpj": _mask(get(col_destinatario_cnpj)),
+            "destinatario_uf": (get(col_destinatario_uf) or None),
+            "produto_nome": get(col_produto_nome) or None,
+            "produto_ncm": get(col_produto_ncm) or None,
+            "produto_cfop": get(col_produto_cfop) or None,
+            "produto_cst_icms": get(col_produto_cst_icms) or None,
+            "produto_base_calculo_icms": _psf(get(col_produto_base_calculo_icms)),
+            "produto_aliquota_icms": _psf(get(col_produto_aliquota_icms)),
+            "produto_valor_icms": _psf(get(col_produto_valor_icms)),
+            "produto_cst_pis": get(col_produto_cst_pis) or None,
+            "produto_valor_pis": _psf(get(col_produto_valor_pis)),
+            "produto_cst_cofins": get(col_produto_cst_cofins) or None,
+            "produto_valor_cofins": _psf(get(col_produto_valor_cofins)),
+            "produto_valor_iss": _psf(get(col_produto_valor_iss)),
+            "produto_qtd": _psf(get(col_produto_qtd)),
+            "produto_valor_unit": _psf(get(col_produto_valor_unit)),
+            "produto_valor_total": _psf(get(col_produto_valor_total)),
         }
 
-        if not entry["produto_nome"]:
-            entry["produto_nome"] = _guess_textual_value(row, textual_candidates, display_map)
-        elif isinstance(entry["produto_nome"], str) and not _contains_alpha(entry["produto_nome"]):
-            fallback_name = _guess_textual_value(row, textual_candidates, display_map)
-            if fallback_name:
-                entry["produto_nome"] = fallback_name
+        if textual_candidates:
+            if not entry["produto_nome"]:
+                entry["produto_nome"] = _guess_textual_value(row, textual_candidates)
+            elif isinstance(entry["produto_nome"], str) and not _contains_alpha(entry["produto_nome"]):
+                fallback_name = _guess_textual_value(row, textual_candidates)
+                if fallback_name:
+                    entry["produto_nome"] = fallback_name
 
         if entry["emitente_uf"]:
             entry["emitente_uf"] = str(entry["emitente_uf"]).upper()
@@ -1316,7 +1650,7 @@ def _convert_tabular_rows(
             nfe_id
             and nfe_id in totals_by_nfe
             and (
-                mapping.get("valor_total_nfe") == mapping.get("nfe_id")
+                total_shares_nfe_column
                 or (
                     isinstance(entry["valor_total_nfe"], (int, float))
                     and entry["valor_total_nfe"] >= 1e12
@@ -1331,7 +1665,7 @@ def _convert_tabular_rows(
             entry["valor_total_nfe"] = entry["produto_valor_total"]
 
         if has_item_total_field and entry["produto_valor_total"] == 0.0:
-            fallback_value = parse_safe_float(row.get(mapping.get("valor_total_nfe", "")))
+            fallback_value = _psf(get(col_valor_total_nfe))
             if fallback_value:
                 entry["produto_valor_total"] = fallback_value
             elif nfe_id and nfe_id in totals_by_nfe:
@@ -1342,9 +1676,10 @@ def _convert_tabular_rows(
             if qty:
                 entry["produto_valor_unit"] = (entry["produto_valor_total"] / qty) if qty else 0.0
 
-        analyzer.observe(entry)
         result.append(entry)
 
+    analyzer.observe_many(result)
+
     column_mapping = {field: display_map.get(column, column) for field, column in mapping.items()}
     meta: Dict[str, object] = {
         "source": source_name,
@@ -1368,6 +1703,8 @@ def _convert_tabular_rows(
 
 
 def _sanitize_filename(filename: str) -> str:
+    if filename.isascii() or max(filename) <= "\xff":
+        return filename.translate(_LATIN1_FILENAME_UNSAFE)
     return "".join(ch if ch.isalnum() or ch in {"_", "-", "."} else "_" for ch in filename)
 
 
@@ -1385,21 +1722,12 @@ def _xml_text(node: Optional[ET.Element]) -> Optional[str]:
 def _mask_cnpj(value: Optional[str]) -> Optional[str]:
     if not value:
         return value
-    digits = "".join(filter(str.isdigit, value))
+    digits = _digits(value)
     if len(digits) < 14:
         return value
     return f"{digits[:8]}****{digits[-2:]}"
 
 
-def _find_child(element: Optional[ET.Element], tag: str) -> Optional[ET.Element]:
-    if element is None:
-        return None
-    child = element.find(f"./{{*}}{tag}")
-    if child is not None:
-        return child
-    return element.find(tag)
-
-
 def _find_children(element: Optional[ET.Element], tag: str) -> List[ET.Element]:
     if element is None:
         return []
@@ -1407,32 +1735,91 @@ def _find_children(element: Optional[ET.Element], tag: str) -> List[ET.Element]:
     return children or element.findall(tag)
 
 
-def _find_path(element: Optional[ET.Element], path: str) -> Optional[ET.Element]:
-    current = element
-    for part in path.split('/'):
-        current = _find_child(current, part)
-        if current is None:
-            return None
-    return current
+def _local_tag(tag: str) -> str:
+    return tag.rpartition('}')[2]
+
+
+def _child_elements(element: Optional[ET.Element]) -> Dict[str, ET.Element]:
+    # One pass over the direct children instead of a namespace-wildcard find per
+    # tag; like find(), the first child with a given local name wins.
+    children: Dict[str, ET.Element] = {}
+    if element is not None:
+        for child in element:
+            children.setdefault(_local_tag(child.tag), child)
+    return children
+
+
+def _first_child_or_self(element: Optional[ET.Element]) -> Optional[ET.Element]:
+    # Tax groups wrap their fields in a variant element (ICMS00, PISAliq, ...).
+    if element is None:
+        return None
+    for child in element:
+        return child
+    return element
 
 
-def _find_text(element: Optional[ET.Element], tag: str) -> Optional[str]:
-    text = _xml_text(_find_child(element, tag))
-    logger.info(f"Finding tag '{tag}': found text '{text}'")
+def _child_text(children: Dict[str, ET.Element], tag: str) -> Optional[str]:
+    text = _xml_text(children.get(tag))
+    logger.debug("Finding tag '%s': found text '%s'", tag, text)
     return text
 
 
-def _find_path_text(element: Optional[ET.Element], path: str) -> Optional[str]:
-    return _xml_text(_find_path(element, path))
+def _nfe_header_fields(inf_nfe: ET.Element) -> Dict[str, object]:
+    nfe_children = _child_elements(inf_nfe)
+    ide = _child_elements(nfe_children.get('ide'))
+    emit = _child_elements(nfe_children.get('emit'))
+    dest = _child_elements(nfe_children.get('dest'))
+    icms_tot = _child_elements(_child_elements(nfe_children.get('total')).get('ICMSTot'))
 
+    total_products = _to_float(_child_text(icms_tot, 'vProd'))
+    total_services = _to_float(_child_text(icms_tot, 'vServ'))
+    total_value = _to_float(_child_text(icms_tot, 'vNF'))
+    if total_value == 0:
+        total_value = total_products + total_services
 
-def _parse_nfe_xml(xml_bytes: bytes) -> Tuple[List[Dict[str, object]], Optional[str]]:
-    logger.info("Starting to parse NFe XML.")
-    try:
-        tree = ET.fromstring(xml_bytes)
-    except ET.ParseError as exc:  # pragma: no cover - defensive branch
-        return [], f"XML malformado: {exc}"
+    return {
+        'nfe_id': inf_nfe.get('Id') or inf_nfe.get('id'),
+        'data_emissao': _child_text(ide, 'dhEmi'),
+        'valor_total_nfe': total_value,
+        'emitente_nome': _child_text(emit, 'xNome'),
+        'emitente_cnpj': _mask_cnpj(_child_text(emit, 'CNPJ')),
+        'emitente_uf': _xml_text(_child_elements(emit.get('enderEmit')).get('UF')),
+        'destinatario_nome': _child_text(dest, 'xNome'),
+        'destinatario_cnpj': _mask_cnpj(_child_text(dest, 'CNPJ')),
+        'destinatario_uf': _xml_text(_child_elements(dest.get('enderDest')).get('UF')),
+    }
 
+
+def _nfe_item_fields(item: ET.Element) -> Dict[str, object]:
+    item_children = _child_elements(item)
+    prod = _child_elements(item_children.get('prod'))
+    imposto = _child_elements(item_children.get('imposto'))
+    icms_block = _child_elements(_first_child_or_self(imposto.get('ICMS')))
+    pis_block = _child_elements(_first_child_or_self(imposto.get('PIS')))
+    cofins_block = _child_elements(_first_child_or_self(imposto.get('COFINS')))
+    issqn_block = _child_elements(imposto.get('ISSQN'))
+
+    return {
+        'produto_nome': _child_text(prod, 'xProd'),
+        'produto_ncm': _child_text(prod, 'NCM'),
+        'produto_cfop': _child_text(prod, 'CFOP'),
+        'produto_cst_icms': _child_text(icms_block, 'CST'),
+        'produto_base_calculo_icms': _to_float(_child_text(icms_block, 'vBC')),
+        'produto_aliquota_icms': _to_float(_child_text(icms_block, 'pICMS')),
+        'produto_valor_icms': _to_float(_child_text(icms_block, 'vICMS')),
+        'produto_cst_pis': _child_text(pis_block, 'CST'),
+        'produto_valor_pis': _to_float(_child_text(pis_block, 'vPIS')),
+        'produto_cst_cofins': _child_text(cofins_block, 'CST'),
+        'produto_valor_cofins': _to_float(_child_text(cofins_block, 'vCOFINS')),
+        'produto_valor_iss': _to_float(_child_text(issqn_block, 'vISSQN')),
+        'produto_qtd': _to_float(_child_text(prod, 'qCom')),
+        'produto_valor_unit': _to_float(_child_text(prod, 'vUnCom')),
+        'produto_valor_total': _to_float(_child_text(prod, 'vProd')),
+    }
+
+
+def _parse_nfe_tree(xml_bytes: bytes) -> Tuple[List[Dict[str, object]], Optional[str]]:
+    tree = ET.fromstring(xml_bytes)
     inf_nfe = tree.find('.//{*}infNFe') or tree.find('.//infNFe')
     if inf_nfe is None:
         return [], "Bloco <infNFe> nao encontrado no XML."
@@ -1441,82 +1828,61 @@ def _parse_nfe_xml(xml_bytes: bytes) -> Tuple[List[Dict[str, object]], Optional[
     if not items:
         return [], "Nenhum item <det> encontrado no XML."
 
-    ide = _find_child(inf_nfe, 'ide') or ET.Element('ide')
-    emit = _find_child(inf_nfe, 'emit') or ET.Element('emit')
-    dest = _find_child(inf_nfe, 'dest') or ET.Element('dest')
-    total = _find_child(inf_nfe, 'total') or ET.Element('total')
-    icms_tot = _find_child(total, 'ICMSTot') or ET.Element('ICMSTot')
-    issqn_tot = _find_child(total, 'ISSQNtot') or ET.Element('ISSQNtot')
+    header = _nfe_header_fields(inf_nfe)
+    return [{**header, **_nfe_item_fields(item)} for item in items], None
 
-    nfe_id = inf_nfe.get('Id') or inf_nfe.get('id')
 
-    result: List[Dict[str, object]] = []
-    total_products = 0.0
-    total_services = 0.0
-    for tag in ("vProd", "vServ"):
-        value = parse_safe_float(_find_text(icms_tot, tag))
-        if tag == "vProd":
-            total_products = value
-        else:
-            total_services = value
+def _parse_nfe_stream(stream: IO[bytes]) -> Tuple[List[Dict[str, object]], Optional[str]]:
+    # <det> blocks precede <total> in the NF-e layout, so item fields are
+    # collected (and their elements released) before the header is complete.
+    inf_nfe: Optional[ET.Element] = None
+    item_fields: List[Dict[str, object]] = []
+    for event, elem in ET.iterparse(stream, events=("start", "end")):
+        tag = _local_tag(elem.tag)
+        if event == "start":
+            if inf_nfe is None and tag == 'infNFe':
+                inf_nfe = elem
+            continue
+        if inf_nfe is None:
+            continue
+        if tag == 'det':
+            item_fields.append(_nfe_item_fields(elem))
+            elem.clear()
+        elif elem is inf_nfe:
+            break
 
-    total_value = parse_safe_float(_find_text(icms_tot, 'vNF'))
-    if total_value == 0:
-        total_value = total_products + total_services
+    if inf_nfe is None:
+        return [], "Bloco <infNFe> nao encontrado no XML."
+    if not item_fields:
+        return [], "Nenhum item <det> encontrado no XML."
 
-    for item in items:
-        prod = _find_child(item, 'prod') or ET.Element('prod')
-        imposto = _find_child(item, 'imposto') or ET.Element('imposto')
-        icms_container = _find_child(imposto, 'ICMS') or ET.Element('ICMS')
-        icms_children = list(icms_container)
-        icms_block = icms_children[0] if icms_children else icms_container
+    header = _nfe_header_fields(inf_nfe)
+    return [{**header, **fields} for fields in item_fields], None
 
-        pis_container = _find_child(imposto, 'PIS') or ET.Element('PIS')
-        pis_children = list(pis_container)
-        pis_block = pis_children[0] if pis_children else pis_container
 
-        cofins_container = _find_child(imposto, 'COFINS') or ET.Element('COFINS')
-        cofins_children = list(cofins_container)
-        cofins_block = cofins_children[0] if cofins_children else cofins_container
+def _parse_nfe_xml(source: bytes | IO[bytes]) -> Tuple[List[Dict[str, object]], Optional[str]]:
+    logger.info("Starting to parse NFe XML.")
+    try:
+        if not isinstance(source, bytes):
+            return _parse_nfe_stream(source)
+        if len(source) < NFE_STREAMING_THRESHOLD:
+            return _parse_nfe_tree(source)
+        return _parse_nfe_stream(io.BytesIO(source))
+    except ET.ParseError as exc:  # pragma: no cover - defensive branch
+        return [], f"XML malformado: {exc}"
 
-        issqn_block = _find_child(imposto, 'ISSQN') or ET.Element('ISSQN')
 
-        entry: Dict[str, object] = {
-            'nfe_id': nfe_id,
-            'data_emissao': _find_text(ide, 'dhEmi'),
-            'valor_total_nfe': total_value,
-            'emitente_nome': _find_text(emit, 'xNome'),
-            'emitente_cnpj': _mask_cnpj(_find_text(emit, 'CNPJ')),
-            'emitente_uf': _find_path_text(emit, 'enderEmit/UF'),
-            'destinatario_nome': _find_text(dest, 'xNome'),
-            'destinatario_cnpj': _mask_cnpj(_find_text(dest, 'CNPJ')),
-            'destinatario_uf': _find_path_text(dest, 'enderDest/UF'),
-            'produto_nome': _find_text(prod, 'xProd'),
-            'produto_ncm': _find_text(prod, 'NCM'),
-            'produto_cfop': _find_text(prod, 'CFOP'),
-            'produto_cst_icms': _find_text(icms_block, 'CST'),
-            'produto_base_calculo_icms': parse_safe_float(_find_text(icms_block, 'vBC')),
-            'produto_aliquota_icms': parse_safe_float(_find_text(icms_block, 'pICMS')),
-            'produto_valor_icms': parse_safe_float(_find_text(icms_block, 'vICMS')),
-            'produto_cst_pis': _find_text(pis_block, 'CST'),
-            'produto_valor_pis': parse_safe_float(_find_text(pis_block, 'vPIS')),
-            'produto_cst_cofins': _find_text(cofins_block, 'CST'),
-            'produto_valor_cofins': parse_safe_float(_find_text(cofins_block, 'vCOFINS')),
-            'produto_valor_iss': parse_safe_float(_find_text(issqn_block, 'vISSQN')),
-            'produto_qtd': parse_safe_float(_find_text(prod, 'qCom')),
-            'produto_valor_unit': parse_safe_float(_find_text(prod, 'vUnCom')),
-            'produto_valor_total': parse_safe_float(_find_text(prod, 'vProd')),
-        }
-        result.append(entry)
-    return result, None
 def _parse_csv(path: Path) -> Tuple[List[Dict[str, object]], Optional[str], Dict[str, object]]:
     try:
-        raw_bytes = path.read_bytes()
+        if path.stat().st_size >= CSV_STREAMING_THRESHOLD:
+            with path.open("rb") as handle:
+                rows, display_map, structure_meta = _read_csv_stream(handle)
+        else:
+            text, encoding = _decode_csv_bytes(path.read_bytes())
+            rows, display_map, structure_meta = _read_csv_rows(text, detected_encoding=encoding)
     except OSError as exc:  # pragma: no cover - unexpected filesystem error
         return [], f"Erro ao ler CSV: {exc}", {"source": path.name}
 
-    text, encoding = _decode_csv_bytes(raw_bytes)
-    rows, display_map, structure_meta = _read_csv_rows(text, detected_encoding=encoding)
     if not rows:
         empty_meta = {
             "source": path.name,
@@ -1540,38 +1906,160 @@ def _parse_csv(path: Path) -> Tuple[List[Dict[str, object]], Optional[str], Dict
     return data, None, meta
 
 
+def _load_json_bytes(raw: bytes) -> object:
+    try:
+        import orjson
+    except ImportError:
+        return json.loads(raw.decode("utf-8"))
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        # orjson is stricter (NaN, integers beyond 64 bits); let the stdlib decide.
+        return json.loads(raw.decode("utf-8"))
+
+
 def _parse_json(path: Path) -> Tuple[List[Dict[str, object]], Optional[str]]:
-    content = json.loads(path.read_text(encoding="utf-8"))
+    content = _load_json_bytes(path.read_bytes())
     if isinstance(content, list):
+        # Decoded objects are already fresh dicts; only coerce other item shapes.
+        if all(type(item) is dict for item in content):
+            return content, None
         return [dict(item) for item in content], None
     raise ValueError("JSON deve ser uma lista de objetos")
 
 
-def _extract_pdf_text(path: Path) -> Tuple[str, Optional[str]]:
-    """Extrai texto de um PDF utilizando pdfminer e, se necessÃƒÂ¡rio, OCR via Tesseract."""
+_TESSEROCR_LOCAL = threading.local()
+# Long-lived OCR workers, so each thread's tesserocr engine stays loaded across PDFs.
+_OCR_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="nexus-ocr")
+_PDF_TEXT_CACHE: OrderedDict[bytes, Tuple[str, Optional[str]]] = OrderedDict()
+_PDF_TEXT_CACHE_LOCK = threading.Lock()
+
+
+def _ocr_page(image_path: str) -> str:
+    import pytesseract
+
+    return pytesseract.image_to_string(image_path, lang="por+eng")
+
+
+def _tesserocr_api() -> Optional[object]:
+    # One resident tesseract engine per _OCR_EXECUTOR thread: tesserocr releases the GIL
+    # while recognising, but a PyTessBaseAPI instance must not be shared across threads.
+    api = getattr(_TESSEROCR_LOCAL, "api", None)
+    if api is None:
+        try:
+            from tesserocr import PyTessBaseAPI
+
+            api = PyTessBaseAPI(lang="por+eng")
+        except (ImportError, RuntimeError):
+            api = False  # not installed or missing traineddata: stick to pytesseract
+        _TESSEROCR_LOCAL.api = api
+    return api or None
+
+
+def _ocr_page_batch(page_paths: List[str]) -> List[str]:
+    api = _tesserocr_api()
+    if api is not None:
+        texts: List[str] = []
+        for page_path in page_paths:
+            api.SetImageFile(page_path)
+            texts.append(api.GetUTF8Text())
+        return texts
+    if len(page_paths) == 1:
+        return [_ocr_page(page_paths[0])]
+    # A .txt input makes tesseract read it as a list of images, so the engine and
+    # language models load once per batch; pages come back separated by form feeds.
+    first_page = Path(page_paths[0])
+    list_path = first_page.with_name(f"{first_page.stem}.batch.txt")
+    list_path.write_text("\n".join(page_paths) + "\n", encoding="utf-8")
     try:
-        from pdfminer.high_level import extract_text
+        return _ocr_page(str(list_path)).split("\x0c")
+    except Exception as exc:  # pragma: no cover - depende do tesseract
+        logger.warning("Falha no OCR em lote de %s paginas, processando individualmente: %s", len(page_paths), exc)
+        return [_ocr_page(page_path) for page_path in page_paths]
+
+
+def _ocr_pages(page_paths: List[str]) -> List[str]:
+    if not page_paths:
+        return []
+    workers = min(os.cpu_count() or 1, len(page_paths))
+    batch_size = -(-len(page_paths) // workers)
+    batches = [page_paths[start : start + batch_size] for start in range(0, len(page_paths), batch_size)]
+    # Both tesserocr and pytesseract's tesseract subprocess run outside the GIL. The
+    # images set OMP_THREAD_LIMIT=1 so parallel batches do not oversubscribe cores.
+    return [chunk for batch in _OCR_EXECUTOR.map(_ocr_page_batch, batches) for chunk in batch]
+
+
+def _open_pymupdf(data: bytes):
+    """Abre o PDF com PyMuPDF quando a biblioteca opcional esta instalada."""
+    try:
+        import fitz
+    except ImportError:
+        return None
+    return fitz.open(stream=data, filetype="pdf")
+
+
+def _render_pdf_pages(data: bytes, document, output_dir: str) -> List[str]:
+    # 200 dpi grayscale is enough for Tesseract and keeps the pixel count per page down.
+    if document is not None:
+        import fitz
+
+        page_paths: List[str] = []
+        for index, page in enumerate(document):
+            page_path = os.path.join(output_dir, f"page-{index:04d}.png")
+            page.get_pixmap(dpi=OCR_RENDER_DPI, colorspace=fitz.csGRAY).save(page_path)
+            page_paths.append(page_path)
+        return page_paths
+
+    from pdf2image import convert_from_bytes
+
+    render_options = {
+        "output_folder": output_dir,
+        "fmt": "png",
+        "paths_only": True,
+        "dpi": OCR_RENDER_DPI,
+        "grayscale": True,
+        "use_pdftocairo": True,
+        "thread_count": os.cpu_count() or 1,
+    }
+    return convert_from_bytes(data, **render_options)
 
-        text = extract_text(str(path))
-        if text and text.strip():
-            return text, None
+
+def _extract_pdf_text(data: bytes, name: str) -> Tuple[str, Optional[str]]:
+    """Extrai texto de um PDF utilizando pdfminer e, se necessÃƒÂ¡rio, OCR via Tesseract."""
+    document = None
+    try:
+        document = _open_pymupdf(data)
     except Exception as exc:  # pragma: no cover - depende de libs externas
-        logger.warning("Falha ao extrair texto de %s com pdfminer: %s", path.name, exc)
+        logger.warning("Falha ao abrir %s com PyMuPDF: %s", name, exc)
 
-    text_chunks: List[str] = []
     try:
-        from pdf2image import convert_from_path
-        import pytesseract
-
-        images = convert_from_path(str(path))
-        for image in images:
-            extracted = pytesseract.image_to_string(image, lang="por+eng")
-            if extracted:
-                text_chunks.append(extracted)
-    except Exception as exc:  # pragma: no cover - depende de poppler/tesseract
-        logger.warning("Falha ao executar OCR em %s: %s", path.name, exc)
-
-    text = "\n".join(chunk.strip() for chunk in text_chunks if chunk.strip())
+        if document is not None:
+            # Native text layer; image-only PDFs come back empty and go to OCR.
+            text = "\n".join(page.get_text() for page in document)
+            if text.strip():
+                return text, None
+        else:
+            try:
+                from pdfminer.high_level import extract_text
+
+                text = extract_text(io.BytesIO(data))
+                if text and text.strip():
+                    return text, None
+            except Exception as exc:  # pragma: no cover - depende de libs externas
+                logger.warning("Falha ao extrair texto de %s com pdfminer: %s", name, exc)
+
+        text_chunks: List[str] = []
+        try:
+            with tempfile.TemporaryDirectory(prefix="nexus_ocr_") as tmp_dir:
+                page_paths = _render_pdf_pages(data, document, tmp_dir)
+                text_chunks = [chunk for chunk in map(str.strip, _ocr_pages(page_paths)) if chunk]
+        except Exception as exc:  # pragma: no cover - depende de poppler/tesseract
+            logger.warning("Falha ao executar OCR em %s: %s", name, exc)
+    finally:
+        if document is not None:
+            document.close()
+
+    text = "\n".join(text_chunks)
     if text:
         return text, None
     return "", "NÃ‡Å“o foi possÃ¯Â¿Â½Ã¯Â¿Â½vel extrair conteÃ‡Â­do deste PDF."
@@ -1581,10 +2069,9 @@ def _extract_currency(raw_value: Optional[str]) -> Optional[float]:
     if not raw_value:
         return None
     normalized = raw_value.strip().replace(".", "").replace(",", ".")
-    try:
-        return float(normalized)
-    except ValueError:
+    if _RE_DECIMAL.fullmatch(normalized) is None:
         return None
+    return float(normalized)
 
 
 def _infer_metadata_from_text(text: str) -> Dict[str, Optional[str]]:
@@ -1601,52 +2088,65 @@ def _infer_metadata_from_text(text: str) -> Dict[str, Optional[str]]:
         "ncm": None,
     }
 
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    lines = [line for line in map(str.strip, text.splitlines()) if line]
     joined = "\n".join(lines)
 
-    chave = re.search(r"(\d{44})", joined)
+    chave = _RE_CHAVE.search(joined)
     if chave:
-        metadata["nfe_id"] = chave.group(1)
-
-    cfop = re.search(r"CFOP\s*[:\-]?\s*(\d{4})", joined, re.IGNORECASE)
-    if cfop:
-        metadata["cfop"] = cfop.group(1)
-
-    ncm = re.search(r"NCM\s*[:\-]?\s*(\d{8})", joined, re.IGNORECASE)
-    if ncm:
-        metadata["ncm"] = ncm.group(1)
-
-    total_match = re.search(r"Valor\s+Total(?:\s+da\s+NF-?e|)\s*[:\-]?\s*([\d\.,]+)", joined, re.IGNORECASE)
-    if total_match:
-        metadata["valor_total_nfe"] = total_match.group(1)
-
-    cnpj_pattern = re.compile(r"CNPJ\s*[:\-]?\s*([\d\.\-/]{14,18})", re.IGNORECASE)
-    cnpj_candidates: List[str] = []
-    for idx, line in enumerate(lines):
-        match = cnpj_pattern.search(line)
-        if not match:
-            continue
-        digits = "".join(filter(str.isdigit, match.group(1)))
-        if digits in cnpj_candidates:
-            continue
-        cnpj_candidates.append(digits)
-        name = line[: match.start()].strip(":- ")
-        if not name and idx > 0:
-            name = lines[idx - 1]
-        if len(cnpj_candidates) == 1:
-            metadata["emitente_cnpj"] = digits
-            metadata["emitente_nome"] = name or metadata["emitente_nome"]
-        elif len(cnpj_candidates) == 2:
-            metadata["destinatario_cnpj"] = digits
-            metadata["destinatario_nome"] = name or metadata["destinatario_nome"]
+        metadata["nfe_id"] = chave.group()
+
+    first_match_fields = {"cfop": "cfop", "ncm": "ncm", "total": "valor_total_nfe"}
+    cnpj_seen: Set[str] = set()
+    uf_matches: List[str] = []
+    line_idx = 0
+    line_start = 0
+    scan_pos = 0
+    last_cnpj_line = -1
+    # Three first-match fields plus two CNPJs and two UFs; stop scanning once all are found.
+    pending = len(first_match_fields) + 4
+    for match in _RE_TEXT_METADATA.finditer(joined):
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind in first_match_fields:
+            field = first_match_fields[kind]
+            if metadata[field] is None:
+                metadata[field] = value
+                pending -= 1
+        elif kind == "uf":
+            if len(uf_matches) < 2:
+                uf_matches.append(value.upper())
+                pending -= 1
+        elif len(cnpj_seen) < 2:
+            newlines = joined.count("\n", scan_pos, match.start())
+            if newlines:
+                line_idx += newlines
+                line_start = joined.rfind("\n", 0, match.start()) + 1
+            scan_pos = match.start()
+            # Only the first CNPJ on each line is considered.
+            if line_idx == last_cnpj_line:
+                continue
+            last_cnpj_line = line_idx
+            digits = _digits(value)
+            if digits in cnpj_seen:
+                continue
+            cnpj_seen.add(digits)
+            pending -= 1
+            name = joined[line_start : match.start()].strip(":- ")
+            if not name and line_idx > 0:
+                name = lines[line_idx - 1]
+            if len(cnpj_seen) == 1:
+                metadata["emitente_cnpj"] = digits
+                metadata["emitente_nome"] = name or metadata["emitente_nome"]
+            else:
+                metadata["destinatario_cnpj"] = digits
+                metadata["destinatario_nome"] = name or metadata["destinatario_nome"]
+        if not pending:
             break
 
-    uf_pattern = re.compile(r"\bUF\s*[:\-]?\s*([A-Z]{2})\b", re.IGNORECASE)
-    uf_matches = uf_pattern.findall(joined)
     if uf_matches:
-        metadata["emitente_uf"] = uf_matches[0].upper()
+        metadata["emitente_uf"] = uf_matches[0]
         if len(uf_matches) > 1:
-            metadata["destinatario_uf"] = uf_matches[1].upper()
+            metadata["destinatario_uf"] = uf_matches[1]
 
     return metadata
 
@@ -1704,29 +2204,38 @@ def _split_table_cells(line: str) -> List[str]:
     stripped = line.strip()
     if not stripped:
         return []
-    if ';' in stripped and stripped.count(';') >= 2:
-        return [cell.strip() for cell in stripped.split(';') if cell.strip()]
-    if '|' in stripped and stripped.count('|') >= 2:
-        return [cell.strip() for cell in stripped.split('|') if cell.strip()]
-    if '\t' in stripped:
-        return [cell.strip() for cell in stripped.split('\t') if cell.strip()]
-    cells = re.split(r"\s{2,}", stripped)
-    return [cell.strip() for cell in cells if cell.strip()]
+    if stripped.count(';') >= 2:
+        delimiter = ';'
+    elif stripped.count('|') >= 2:
+        delimiter = '|'
+    elif '\t' in stripped:
+        delimiter = '\t'
+    else:
+        return [cell for cell in map(str.strip, _RE_SPLIT_WS.split(stripped)) if cell]
+    # Quoted cells may contain the delimiter; only then pay for the csv module.
+    if '"' in stripped:
+        cells = next(csv.reader([stripped], delimiter=delimiter))
+    else:
+        cells = stripped.split(delimiter)
+    return [cell for cell in map(str.strip, cells) if cell]
 
 
 def _extract_structured_rows_from_text(text: str) -> Tuple[List[Dict[str, str]], Dict[str, str], Dict[str, object]]:
-    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
-    candidate_tables: List[Tuple[List[str], List[Dict[str, str]], int, int]] = []
+    # After rstrip a non-empty line always ends in a non-space character.
+    lines = [line for line in map(str.rstrip, text.splitlines()) if line]
+    # A line that ends one table is retried as the next header; split each line once.
+    line_cells = [_split_table_cells(line) for line in lines]
+    candidate_tables: List[Tuple[List[str], List[List[str]], int, int]] = []
     idx = 0
     while idx < len(lines):
-        header_cells = _split_table_cells(lines[idx])
+        header_cells = line_cells[idx]
         if len(header_cells) < 3 or not any(any(ch.isalpha() for ch in cell) for cell in header_cells):
             idx += 1
             continue
-        rows: List[Dict[str, str]] = []
+        rows: List[List[str]] = []
         idx2 = idx + 1
         while idx2 < len(lines):
-            row_cells = _split_table_cells(lines[idx2])
+            row_cells = line_cells[idx2]
             if not row_cells:
                 idx2 += 1
                 continue
@@ -1736,8 +2245,8 @@ def _extract_structured_rows_from_text(text: str) -> Tuple[List[Dict[str, str]],
                 if len(row_cells) > len(header_cells):
                     row_cells = row_cells[: len(header_cells)]
                 else:
-                    row_cells.extend(["" for _ in range(len(header_cells) - len(row_cells))])
-            rows.append(dict(zip(header_cells, row_cells)))
+                    row_cells = row_cells + [""] * (len(header_cells) - len(row_cells))
+            rows.append(row_cells)
             idx2 += 1
         if len(rows) >= 1:
             candidate_tables.append((header_cells, rows, idx, idx2))
@@ -1749,7 +2258,7 @@ def _extract_structured_rows_from_text(text: str) -> Tuple[List[Dict[str, str]],
         return [], {}, {}
 
     header, table_rows, start_idx, end_idx = max(candidate_tables, key=lambda item: len(item[1]))
-    normalized_rows, display_map = _prepare_generic_rows(table_rows)
+    normalized_rows, display_map = _prepare_generic_table(header, table_rows)
     table_meta = {
         "table_header": header,
         "table_start_line": start_idx,
@@ -1770,56 +2279,80 @@ def _parse_tabular_text(text: str, source_name: str) -> Tuple[List[Dict[str, obj
     return data, meta
 
 
-def _parse_pdf(path: Path) -> Tuple[List[Dict[str, object]], Optional[str], Optional[str], Dict[str, object]]:
-    text, error = _extract_pdf_text(path)
+def _extract_pdf_text_cached(data: bytes, name: str) -> Tuple[str, Optional[str]]:
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    with _PDF_TEXT_CACHE_LOCK:
+        cached = _PDF_TEXT_CACHE.get(digest)
+        if cached is not None:
+            _PDF_TEXT_CACHE.move_to_end(digest)
+            return cached
+    result = _extract_pdf_text(data, name)
+    if result[0]:
+        with _PDF_TEXT_CACHE_LOCK:
+            _PDF_TEXT_CACHE[digest] = result
+            if len(_PDF_TEXT_CACHE) > PDF_TEXT_CACHE_SIZE:
+                _PDF_TEXT_CACHE.popitem(last=False)
+    return result
+
+
+def _parse_pdf(
+    data: bytes, name: str
+) -> Tuple[List[Dict[str, object]], Optional[str], Optional[str], Dict[str, object]]:
+    text, error = _extract_pdf_text_cached(data, name)
     if not text:
         return [], None, error, {}
-    tabular_data, tabular_meta = _parse_tabular_text(text, path.name)
+    tabular_data, tabular_meta = _parse_tabular_text(text, name)
     if tabular_data:
         return tabular_data, text, None, tabular_meta
-    data, meta = _summarize_text_document(text, path.name)
+    data, meta = _summarize_text_document(text, name)
     return data, text, None, meta
 
 
-def _parse_ocr(path: Path) -> Tuple[List[Dict[str, object]], Optional[str], Optional[str], Dict[str, object]]:
+def _parse_ocr(data_bytes: bytes, name: str) -> Tuple[List[Dict[str, object]], Optional[str], Optional[str], Dict[str, object]]:
     try:
-        text = path.read_text(encoding="utf-8")
+        text = data_bytes.decode("utf-8")
     except UnicodeDecodeError:
-        text = path.read_text(encoding="latin-1")
-    tabular_data, tabular_meta = _parse_tabular_text(text, path.name)
+        text = data_bytes.decode("latin-1")
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    tabular_data, tabular_meta = _parse_tabular_text(text, name)
     if tabular_data:
         return tabular_data, text, None, tabular_meta
-    data, meta = _summarize_text_document(text, path.name)
+    data, meta = _summarize_text_document(text, name)
     return data, text, None, meta
 
 
 def _handle_single_file(path: Path) -> ImportedDoc:
     ext = _get_extension(path)
     kind = SUPPORTED_KINDS.get(ext, "UNSUPPORTED")
+    size = path.stat().st_size
     if kind == "UNSUPPORTED":
-        return ImportedDoc(kind="UNSUPPORTED", name=path.name, size=path.stat().st_size, status="unsupported", error="Formato nao suportado.")
+        return ImportedDoc(kind="UNSUPPORTED", name=path.name, size=size, status="unsupported", error="Formato nao suportado.")
 
     try:
         text: Optional[str] = None
         meta: Dict[str, object] = {}
         if ext == "xml":
-            data, error = _parse_nfe_xml(path.read_bytes())
+            if size < NFE_STREAMING_THRESHOLD:
+                data, error = _parse_nfe_xml(path.read_bytes())
+            else:
+                with path.open("rb") as handle:
+                    data, error = _parse_nfe_xml(handle)
         elif ext == "pdf":
-            data, text, error, meta = _parse_pdf(path)
+            data, text, error, meta = _parse_pdf(path.read_bytes(), path.name)
         elif ext == "ocr":
-            data, text, error, meta = _parse_ocr(path)
+            data, text, error, meta = _parse_ocr(path.read_bytes(), path.name)
         elif ext == "csv":
             data, error, meta = _parse_csv(path)
         elif ext == "json":
             data, error = _parse_json(path)
         else:  # pragma: no cover - defensive branch
-            return ImportedDoc(kind="UNSUPPORTED", name=path.name, size=path.stat().st_size, status="unsupported", error="Formato nao suportado.")
+            return ImportedDoc(kind="UNSUPPORTED", name=path.name, size=size, status="unsupported", error="Formato nao suportado.")
 
         status = "parsed" if data else "error"
         return ImportedDoc(
             kind=kind,
             name=path.name,
-            size=path.stat().st_size,
+            size=size,
             status=status,
             data=data or None,
             text=text,
@@ -1828,76 +2361,149 @@ def _handle_single_file(path: Path) -> ImportedDoc:
         )
     except Exception as exc:  # pragma: no cover - defensive branch
         logger.exception("Erro ao processar arquivo %s", path.name)
-        return ImportedDoc(kind=kind, name=path.name, size=path.stat().st_size, status="error", error=str(exc))
+        return ImportedDoc(kind=kind, name=path.name, size=size, status="error", error=str(exc))
 
-def _handle_zip(path: Path, progress_callback: Optional[ProgressCallback]) -> List[ImportedDoc]:
-    docs: List[ImportedDoc] = []
+
+def _mark_pool_worker() -> None:
+    global _IN_POOL_WORKER
+    _IN_POOL_WORKER = True
+
+
+def _process_pool_for(jobs: int, payload_bytes: int, max_workers: Optional[int]) -> Optional[ProcessPoolExecutor]:
+    """Devolve o pool de processos compartilhado quando o chamador o pediu e o lote compensa."""
+    # Opt-in only: spawned workers re-import the caller's __main__ and everything it pulls
+    # in. The pool starts on first use with the requested size and is reused by later
+    # batches and archives; its own workers parse their share inline.
+    if max_workers is None or max_workers < 2 or jobs < 2 or payload_bytes < PROCESS_POOL_MIN_BYTES or _IN_POOL_WORKER:
+        return None
+    global _PROCESS_POOL
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL is None:
+            _PROCESS_POOL = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=_SPAWN_CONTEXT, initializer=_mark_pool_worker
+            )
+        return _PROCESS_POOL
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    # A worker that dies (an OOM kill, say) breaks the whole pool; the next opt-in batch
+    # starts a fresh one instead of failing on every submit.
+    global _PROCESS_POOL
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL is pool:
+            _PROCESS_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def _shutdown_process_pool() -> None:
+    with _PROCESS_POOL_LOCK:
+        pool = _PROCESS_POOL
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def _process_zip_entry(
+    path: Path, info: ZipInfo, filename: str, ext: str, payload: bytes | IO[bytes]
+) -> ImportedDoc:
+    # Large XML and CSV members arrive as an open stream; everything else as bytes.
+    size = len(payload) if isinstance(payload, bytes) else info.file_size
+    text = None
+    meta_extra: Dict[str, object] = {}
+    if ext == "xml":
+        data, error = _parse_nfe_xml(payload)
+        kind = "NFE_XML"
+    elif ext == "pdf":
+        data, text, error, meta_extra = _parse_pdf(payload, filename)
+        kind = "PDF"
+    elif ext == "ocr":
+        data, text, error, meta_extra = _parse_ocr(payload, filename)
+        kind = "OCR_TEXT"
+    else:
+        if isinstance(payload, bytes):
+            csv_text, encoding = _decode_csv_bytes(payload)
+            rows, display_map, structure_meta = _read_csv_rows(csv_text, detected_encoding=encoding)
+        else:
+            rows, display_map, structure_meta = _read_csv_stream(payload)
+        kind = "CSV"
+        if rows:
+            data, meta_extra = _convert_tabular_rows(rows, display_map, filename)
+            meta_extra["structure"] = structure_meta
+            error = None
+        else:
+            data = []
+            meta_extra = {
+                "source": filename,
+                "row_count": 0,
+                "column_mapping": {},
+                "has_structured_table": False,
+                "has_text_only": False,
+                "analysis_scope": "full_document",
+                "structure": structure_meta,
+                "processing_stats": {
+                    "mode": "incremental",
+                    "rows_processed": 0,
+                    "columns_detected": structure_meta.get("column_count", 0),
+                    "parallelized": False,
+                },
+            }
+            error = "Nenhuma linha encontrada no CSV."
+    status = "parsed" if data else "error"
+    zip_meta = {"source_zip": path.name, "internal_path": info.filename}
+    if meta_extra:
+        zip_meta.update(meta_extra)
+    return ImportedDoc(
+        kind=kind,
+        name=filename,
+        size=size,
+        status=status,
+        data=data or None,
+        text=text,
+        error=error,
+        meta=zip_meta,
+    )
+
+
+def _handle_zip(
+    path: Path, progress_callback: Optional[ProgressCallback], max_workers: Optional[int] = None
+) -> List[ImportedDoc]:
     with ZipFile(path, "r") as archive:
         members = [m for m in archive.infolist() if not m.is_dir()]
         total = len(members)
-        for index, info in enumerate(members, start=1):
+        filenames = [_sanitize_filename(info.filename) for info in members]
+        extensions = [filename.rpartition(".")[2].lower() for filename in filenames]
+        docs: List[Optional[ImportedDoc]] = [None] * total
+        completed = 0
+
+        def finish(index: int, doc: ImportedDoc) -> None:
+            nonlocal completed
+            docs[index] = doc
+            completed += 1
             if progress_callback:
-                progress_callback(index, total)
-            with archive.open(info, "r") as file_handle:
-                filename = _sanitize_filename(info.filename)
-                ext = filename.lower().split(".")[-1]
-                logger.info(f"Handling file in zip: {filename}, extension: {ext}")
-                data_bytes = file_handle.read()
-                text = None
-                meta_extra: Dict[str, object] = {}
-                if ext == "xml":
-                    data, error = _parse_nfe_xml(data_bytes)
-                    size = len(data_bytes)
-                    kind = "NFE_XML"
-                elif ext == "pdf":
-                    tmp_path = path.parent / f"__tmp_{_sanitize_filename(info.filename)}"
-                    tmp_path.write_bytes(data_bytes)
-                    try:
-                        data, text, error, meta_extra = _parse_pdf(tmp_path)
-                    finally:
-                        if tmp_path.exists():
-                            tmp_path.unlink()
-                    size = len(data_bytes)
-                    kind = "PDF"
-                elif ext == "ocr":
-                    tmp_path = path.parent / f"__tmp_{_sanitize_filename(info.filename)}"
-                    tmp_path.write_bytes(data_bytes)
-                    try:
-                        data, text, error, meta_extra = _parse_ocr(tmp_path)
-                    finally:
-                        if tmp_path.exists():
-                            tmp_path.unlink()
-                    size = len(data_bytes)
-                    kind = "OCR_TEXT"
-                elif ext == "csv":
-                    csv_text, encoding = _decode_csv_bytes(data_bytes)
-                    rows, display_map, structure_meta = _read_csv_rows(csv_text, detected_encoding=encoding)
-                    size = len(data_bytes)
-                    kind = "CSV"
-                    if rows:
-                        data, meta_extra = _convert_tabular_rows(rows, display_map, filename)
-                        meta_extra["structure"] = structure_meta
-                        error = None
-                    else:
-                        data = []
-                        meta_extra = {
-                            "source": filename,
-                            "row_count": 0,
-                            "column_mapping": {},
-                            "has_structured_table": False,
-                            "has_text_only": False,
-                            "analysis_scope": "full_document",
-                            "structure": structure_meta,
-                            "processing_stats": {
-                                "mode": "incremental",
-                                "rows_processed": 0,
-                                "columns_detected": structure_meta.get("column_count", 0),
-                                "parallelized": False,
-                            },
-                        }
-                        error = "Nenhuma linha encontrada no CSV."
-                else:
-                    docs.append(
+                progress_callback(completed, total)
+
+        # PDF members spend most of their time in poppler/tesseract, which release the GIL,
+        # so they are parsed on worker threads while the archive keeps being read. OCR and
+        # in-memory CSV/XML members are pure-Python parsing and go to the shared process
+        # pool when the caller opted in and there is enough of them to pay for the hand-off.
+        in_memory_sizes = [
+            info.file_size
+            for info, ext in zip(members, extensions)
+            if (ext == "ocr")
+            or (ext == "xml" and info.file_size < NFE_STREAMING_THRESHOLD)
+            or (ext == "csv" and info.file_size < CSV_STREAMING_THRESHOLD)
+        ]
+        process_executor = pool = _process_pool_for(len(in_memory_sizes), sum(in_memory_sizes), max_workers)
+        pending: Dict[Future[ImportedDoc], int] = {}
+        parallel_indexes: Set[int] = set()
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+            for index, info in enumerate(members):
+                filename = filenames[index]
+                ext = extensions[index]
+                logger.debug("Handling file in zip: %s, extension: %s", filename, ext)
+                if ext not in ZIP_MEMBER_EXTENSIONS:
+                    finish(
+                        index,
                         ImportedDoc(
                             kind="UNSUPPORTED",
                             name=filename,
@@ -1905,49 +2511,96 @@ def _handle_zip(path: Path, progress_callback: Optional[ProgressCallback]) -> Li
                             status="unsupported",
                             error="Formato nao suportado dentro do ZIP.",
                             meta={"source_zip": path.name, "internal_path": info.filename},
-                        )
+                        ),
                     )
                     continue
-                status = "parsed" if data else "error"
-                zip_meta = {"source_zip": path.name, "internal_path": info.filename}
-                if meta_extra:
-                    zip_meta.update(meta_extra)
-                docs.append(
-                    ImportedDoc(
-                        kind=kind,
-                        name=filename,
-                        size=size,
-                        status=status,
-                        data=data or None,
-                        text=text,
-                        error=error,
-                        meta=zip_meta,
-                    )
-                )
-    return docs
-
-
-def _process_path(path: Path) -> List[ImportedDoc]:
+                if (ext == "xml" and info.file_size >= NFE_STREAMING_THRESHOLD) or (
+                    ext == "csv" and info.file_size >= CSV_STREAMING_THRESHOLD
+                ):
+                    with archive.open(info, "r") as handle:
+                        finish(index, _process_zip_entry(path, info, filename, ext, handle))
+                    continue
+                data_bytes = archive.read(info)
+                if ext == "pdf":
+                    future = executor.submit(_process_zip_entry, path, info, filename, ext, data_bytes)
+                    pending[future] = index
+                    continue
+                if process_executor is not None:
+                    try:
+                        future = process_executor.submit(_process_zip_entry, path, info, filename, ext, data_bytes)
+                    except BrokenProcessPool:
+                        _discard_process_pool(process_executor)
+                        process_executor = None
+                    else:
+                        pending[future] = index
+                        parallel_indexes.add(index)
+                        continue
+                finish(index, _process_zip_entry(path, info, filename, ext, data_bytes))
+            for future in as_completed(pending):
+                index = pending[future]
+                try:
+                    doc = future.result()
+                except BrokenProcessPool:
+                    # A worker died; this member is parsed here and the others keep their results.
+                    _discard_process_pool(pool)
+                    parallel_indexes.discard(index)
+                    info = members[index]
+                    doc = _process_zip_entry(path, info, filenames[index], extensions[index], archive.read(info))
+                finish(index, doc)
+    for index in parallel_indexes:
+        stats = docs[index].meta.get("processing_stats")
+        if isinstance(stats, dict):
+            stats["parallelized"] = True
+    return [doc for doc in docs if doc is not None]
+
+
+def _process_path(path: Path, max_workers: Optional[int] = None) -> List[ImportedDoc]:
     if _get_extension(path) == "zip":
-        return _handle_zip(path, None)
+        return _handle_zip(path, None, max_workers)
     return [_handle_single_file(path)]
 
 
-def extract_documents(file_paths: Iterable[str | Path], progress_callback: Optional[ProgressCallback] = None) -> List[ImportedDoc]:
+def extract_documents(
+    file_paths: Iterable[str | Path],
+    progress_callback: Optional[ProgressCallback] = None,
+    *,
+    max_workers: Optional[int] = None,
+) -> List[ImportedDoc]:
     file_list = [Path(path) for path in file_paths]
     total = len(file_list)
     if total == 0:
         return []
-    if total > 1 and progress_callback is None:
-        parallel_docs: List[ImportedDoc] = []
-        with ThreadPoolExecutor(max_workers=min(4, total)) as executor:
-            futures = [(index, executor.submit(_process_path, path)) for index, path in enumerate(file_list)]
-            ordered_results: List[Tuple[int, List[ImportedDoc]]] = []
-            for index, future in futures:
-                ordered_results.append((index, future.result()))
-        ordered_results.sort(key=lambda item: item[0])
-        for _, docs_chunk in ordered_results:
-            parallel_docs.extend(docs_chunk)
+    # Files are parsed on threads by default. Callers that pass max_workers (typically
+    # min(len(file_paths), os.cpu_count())) opt into the shared process pool, which
+    # batches and ZIP archives large enough to pay for it are handed to.
+    process_executor = _process_pool_for(total, sum(path.stat().st_size for path in file_list), max_workers)
+    # With a progress callback and no process pool, files are parsed in order and in
+    # process, so ZIP members report their own progress as well.
+    if total > 1 and (progress_callback is None or process_executor is not None):
+        results: List[List[ImportedDoc]] = [[] for _ in file_list]
+        pool = process_executor
+        with ThreadPoolExecutor(max_workers=min(4, total)) as thread_executor:
+            futures: Dict[Future[List[ImportedDoc]], int] = {}
+            for index, path in enumerate(file_list):
+                if process_executor is not None:
+                    try:
+                        futures[process_executor.submit(_process_path, path, max_workers)] = index
+                        continue
+                    except BrokenProcessPool:
+                        _discard_process_pool(process_executor)
+                        process_executor = None
+                futures[thread_executor.submit(_process_path, path, max_workers)] = index
+            for completed, future in enumerate(as_completed(futures), start=1):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                except BrokenProcessPool:
+                    # A worker died mid-batch; parse the file here rather than fail the batch.
+                    _discard_process_pool(pool)
+                    results[index] = _process_path(file_list[index])
+                if progress_callback:
+                    progress_callback(completed, total)
+        parallel_docs = [doc for docs_chunk in results for doc in docs_chunk]
         for doc in parallel_docs:
             stats = doc.meta.get("processing_stats")
             if isinstance(stats, dict):
@@ -1959,7 +2612,7 @@ def extract_documents(file_paths: Iterable[str | Path], progress_callback: Optio
         if progress_callback:
             progress_callback(index, total)
         if _get_extension(path) == "zip":
-            docs.extend(_handle_zip(path, progress_callback))
+            docs.extend(_handle_zip(path, progress_callback, max_workers))
         else:
             docs.append(_handle_single_file(path))
     return docs
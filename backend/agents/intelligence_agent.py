@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections import defaultdict
+import math
 from typing import Dict, List
 
 from backend.types import AuditReport, AIDrivenInsight, CrossValidationResult
@@ -28,22 +28,39 @@ def run_intelligence_analysis(report: AuditReport) -> Dict[str, List[object]]:
             )
         )
 
-    price_map: Dict[str, List[float]] = defaultdict(list)
+    # Running [min, max, count] of positive unit prices per product, in first-seen order.
+    price_ranges: Dict[str, List[float]] = {}
+    # Product names repeat across items and documents; strip each distinct string once.
+    stripped_names: Dict[str, str] = {}
     for doc in valid_docs:
         for item in doc.doc.data or []:
-            name = str(item.get("produto_nome") or "").strip()
+            raw_name = item.get("produto_nome")
+            if not raw_name:
+                continue
+            if isinstance(raw_name, str):
+                name = stripped_names.get(raw_name)
+                if name is None:
+                    name = stripped_names[raw_name] = raw_name.strip()
+            else:
+                name = str(raw_name).strip()
             if not name:
                 continue
-            price_map[name].append(parse_safe_float(item.get("produto_valor_unit")))
+            price_range = price_ranges.get(name)
+            if price_range is None:
+                price_range = price_ranges[name] = [math.inf, -math.inf, 0]
+            # Extracted items already carry floats; only raw values need parsing.
+            raw_price = item.get("produto_valor_unit")
+            price = raw_price if type(raw_price) is float else parse_safe_float(raw_price)
+            if price > 0:
+                if price < price_range[0]:
+                    price_range[0] = price
+                if price > price_range[1]:
+                    price_range[1] = price
+                price_range[2] += 1
 
     insights: List[AIDrivenInsight] = []
-    for product, prices in price_map.items():
-        filtered = [price for price in prices if price > 0]
-        if len(filtered) < 2:
-            continue
-        min_price = min(filtered)
-        max_price = max(filtered)
-        if min_price <= 0:
+    for product, (min_price, max_price, count) in price_ranges.items():
+        if count < 2:
             continue
         variation = (max_price - min_price) / min_price
         if variation > PRICE_VARIATION_THRESHOLD:
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Tuple
 
 from backend.types import AuditReport, AuditedDocument, ImportedDoc, AuditStatus, Inconsistency
-from backend.utils.rules_engine import run_fiscal_validation
+from backend.utils.rules_engine import RULES_KEYS, run_fiscal_validation
 
 SEVERITY_WEIGHTS = {
     "ERRO": 10,
@@ -11,9 +11,16 @@ SEVERITY_WEIGHTS = {
     "INFO": 0,
 }
 
+_SEVERITY_RANK = {"ALERTA": 1, "ERRO": 2}
+_STATUS_BY_RANK = (AuditStatus.OK, AuditStatus.ALERTA, AuditStatus.ERRO)
+
 
 def run_audit(docs: List[ImportedDoc]) -> AuditReport:
     audited_documents: List[AuditedDocument] = []
+    # Line items repeat the same product/CFOP/UF combinations across a batch, so the
+    # rules run once per distinct combination. Types are part of the key because the
+    # rules stringify some fields (5102 and 5102.0 hash alike but read differently).
+    findings_cache: Dict[Tuple[object, ...], Tuple[Inconsistency, ...]] = {}
     for doc in docs:
         if doc.status in {"error", "unsupported"}:
             inconsistency = Inconsistency(
@@ -35,23 +42,32 @@ def run_audit(docs: List[ImportedDoc]) -> AuditReport:
             )
             continue
 
-        findings = []
+        # Rules return shared Inconsistency instances, one per code, so the first
+        # occurrence of a code stands for all of them.
+        unique_incs: Dict[str, Inconsistency] = {}
+        score = 0
+        worst_rank = 0
         for item in doc.data or []:
-            findings.extend(run_fiscal_validation(item))
-
-        unique_incs = list({inc.code: inc for inc in findings}.values())
-        status = AuditStatus.OK
-        if any(inc.severity == "ERRO" for inc in unique_incs):
-            status = AuditStatus.ERRO
-        elif any(inc.severity == "ALERTA" for inc in unique_incs):
-            status = AuditStatus.ALERTA
+            values = tuple(map(item.get, RULES_KEYS))
+            key = values + tuple(map(type, values))
+            try:
+                findings = findings_cache.get(key)
+                if findings is None:
+                    findings = findings_cache[key] = tuple(run_fiscal_validation(item))
+            except TypeError:  # unhashable field value
+                findings = run_fiscal_validation(item)
+            for inc in findings:
+                if inc.code in unique_incs:
+                    continue
+                unique_incs[inc.code] = inc
+                score += SEVERITY_WEIGHTS.get(inc.severity, 0)
+                worst_rank = max(worst_rank, _SEVERITY_RANK.get(inc.severity, 0))
 
-        score = sum(SEVERITY_WEIGHTS.get(inc.severity, 0) for inc in unique_incs)
         audited_documents.append(
             AuditedDocument(
                 doc=doc,
-                status=status,
-                inconsistencies=unique_incs,
+                status=_STATUS_BY_RANK[worst_rank],
+                inconsistencies=list(unique_incs.values()),
                 score=score,
             )
         )
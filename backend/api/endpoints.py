@@ -3,6 +3,7 @@ from __future__ import annotations
 import json
 import logging
 import os
+import shutil
 import uuid
 from pathlib import Path
 import tempfile
@@ -11,16 +12,18 @@ from typing import Any, Dict, Iterable, List, Optional
 from fastapi import APIRouter, Depends, File, HTTPException, Query, Response, UploadFile, status
 from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field, ConfigDict
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from starlette.concurrency import run_in_threadpool
 
 from backend.agents.consultant_agent import ConsultantAgent, ConsultantAgentError
 from backend.agents.dynamic_analysis_agent import DynamicAnalysisAgent
 from backend.core.config import get_settings
-from backend.database import get_session
+from backend.database import get_async_session
 from backend.database.models import Task
 from backend.services.llm_client import LLMClient, LLMClientError
 from backend.services.repositories import SQLAlchemyReportRepository, SQLAlchemyStatusRepository
-from backend.services.storage import FileStorage
+from backend.services.storage import UPLOAD_COPY_CHUNK_SIZE, FileStorage
 from backend.services.task_queue import InlineTaskPublisher, RabbitMQPublisher, TaskPublisher
 from backend.types import AgentPhase
 from backend.worker import AuditWorker
@@ -257,13 +260,13 @@ def _build_streaming_response(
 
 
 @router.post("/upload", response_model=UploadResponse, status_code=status.HTTP_202_ACCEPTED, tags=["tasks"])
-async def upload_files(files: List[UploadFile] = File(...), db: Session = Depends(get_session)) -> UploadResponse:
+async def upload_files(files: List[UploadFile] = File(...), db: AsyncSession = Depends(get_async_session)) -> UploadResponse:
     if not files:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Nenhum arquivo foi enviado.")
 
     task = Task(status="PENDING", progress=0)
     db.add(task)
-    db.flush()
+    await db.flush()
 
     saved_references: List[Dict[str, Any]] = []
     try:
@@ -272,27 +275,33 @@ async def upload_files(files: List[UploadFile] = File(...), db: Session = Depend
             saved_references.append(reference)
     except Exception as exc:
         logger.exception("Failed to persist uploaded files for task %s", task.id)
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Falha ao salvar arquivos para análise.") from exc
 
     task.original_filename = ", ".join(ref.get("original_name", "") for ref in saved_references if ref.get("original_name")) or None
     task.input_metadata = {"files": saved_references}
     task.agent_status = _initial_agent_state(len(files))
-    db.commit()
+    await db.commit()
 
+    # Broker and status-repository calls are blocking I/O; keep them off the event loop.
     try:
-        _publisher.publish({"task_id": str(task.id), "files": saved_references})
+        await run_in_threadpool(_publisher.publish, {"task_id": str(task.id), "files": saved_references})
     except Exception as exc:
         logger.exception("Failed to enqueue task %s", task.id)
-        _status_repository.update_task_status(str(task.id), "FAILURE", detail="Falha ao enfileirar tarefa para processamento.")
+        await run_in_threadpool(
+            _status_repository.update_task_status,
+            str(task.id),
+            "FAILURE",
+            detail="Falha ao enfileirar tarefa para processamento.",
+        )
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Falha ao enfileirar tarefa para processamento.") from exc
 
     return UploadResponse(task_id=task.id, status=task.status)
 
 
 @router.get("/status/{task_id}", response_model=StatusResponse, tags=["tasks"])
-async def get_status(task_id: uuid.UUID, db: Session = Depends(get_session)) -> StatusResponse:
-    task = db.get(Task, task_id)
+async def get_status(task_id: uuid.UUID, db: AsyncSession = Depends(get_async_session)) -> StatusResponse:
+    task = await db.get(Task, task_id)
     if task is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Task não encontrada.")
 
@@ -314,18 +323,23 @@ async def get_status(task_id: uuid.UUID, db: Session = Depends(get_session)) ->
 
 
 @router.get("/report/{task_id}", response_model=ReportResponse, tags=["tasks"])
-async def get_report(task_id: uuid.UUID, db: Session = Depends(get_session)) -> ReportResponse:
-    task = db.get(Task, task_id)
+async def get_report(task_id: uuid.UUID, db: AsyncSession = Depends(get_async_session)) -> Response:
+    task = await db.get(Task, task_id, options=[joinedload(Task.report)])
     if task is None or task.report is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Relatório não encontrado.")
 
     report = task.report
-    return ReportResponse(task_id=task.id, content=report.content, generated_at=report.updated_at.isoformat())
+    # Validate the report tree once and serialize the model directly; returning the
+    # model would make FastAPI validate it a second time against response_model.
+    payload = ReportResponse(task_id=task.id, content=report.content, generated_at=report.updated_at.isoformat())
+    return Response(content=payload.model_dump_json(), media_type="application/json")
 
 
 @router.patch("/report/{task_id}/classification", status_code=status.HTTP_204_NO_CONTENT, tags=["tasks"])
-async def update_classification(task_id: uuid.UUID, payload: ClassificationUpdate, db: Session = Depends(get_session)) -> Response:
-    task = db.get(Task, task_id)
+async def update_classification(
+    task_id: uuid.UUID, payload: ClassificationUpdate, db: AsyncSession = Depends(get_async_session)
+) -> Response:
+    task = await db.get(Task, task_id, options=[joinedload(Task.report)])
     if task is None or task.report is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Relatório não encontrado para atualização.")
 
@@ -346,7 +360,7 @@ async def update_classification(task_id: uuid.UUID, payload: ClassificationUpdat
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Documento não encontrado para atualização.")
 
     task.report.content = content
-    db.commit()
+    await db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.post("/analyze/dynamic", tags=["analysis"])
@@ -365,11 +379,11 @@ async def analyze_dynamic_document(file: UploadFile = File(...)):
     # Save the uploaded file to a temporary file
     try:
         with tempfile.NamedTemporaryFile(delete=False, suffix=Path(file.filename).suffix) as tmp:
-            tmp.write(await file.read())
+            await run_in_threadpool(shutil.copyfileobj, file.file, tmp, UPLOAD_COPY_CHUNK_SIZE)
             tmp_path = tmp.name
         
         # Run the analysis
-        analysis_result = _dynamic_analyzer.analyze_document(tmp_path)
+        analysis_result = await run_in_threadpool(_dynamic_analyzer.analyze_document, tmp_path)
         
         return JSONResponse(content=analysis_result)
 
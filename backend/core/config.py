@@ -173,6 +173,21 @@ class Settings(BaseSettings):
             url = url.set(drivername=url.drivername.replace("+aiosqlite", "+pysqlite"))
         return str(url)
 
+    @property
+    def sqlalchemy_async_url(self) -> str:
+        """Return a SQLAlchemy URL compatible with asyncio engines."""
+
+        from sqlalchemy.engine import make_url
+
+        url = make_url(self.postgres_dsn)
+        backend_name, _, driver = url.drivername.partition("+")
+        if backend_name == "sqlite" and driver != "aiosqlite":
+            url = url.set(drivername="sqlite+aiosqlite")
+        elif backend_name == "postgresql" and driver not in ("psycopg", "asyncpg"):
+            # psycopg 3 drives both the sync and the asyncio engine.
+            url = url.set(drivername="postgresql+psycopg")
+        return url.render_as_string(hide_password=False)
+
     @property
     def storage_directories(self) -> Tuple[Path, Path]:
         """Convenience tuple containing the storage and embedding directories."""
@@ -2,19 +2,20 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from backend.core.config import settings
+from backend.core.config import Settings, settings
 
 
-def _create_engine() -> Engine:
+def _create_engine(app_settings: Settings = settings) -> Engine:
 
-    url = make_url(settings.sqlalchemy_sync_url)
+    url = make_url(app_settings.sqlalchemy_sync_url)
     engine_kwargs: dict[str, object] = {"future": True}
     connect_args: dict[str, object] = {}
 
@@ -31,9 +32,27 @@ def _create_engine() -> Engine:
     return create_engine(url, **engine_kwargs)
 
 
+def _create_async_engine(app_settings: Settings = settings) -> AsyncEngine:
+    # Serves the API handlers; workers and migrations keep the sync engine. Both point
+    # at the same database, except for in-memory SQLite, which is private to each
+    # engine: only single-process setups such as tests should use it.
+    url = make_url(app_settings.sqlalchemy_async_url)
+    engine_kwargs: dict[str, object] = {}
+
+    if url.drivername.startswith("sqlite") and url.database in (None, "", ":memory:"):
+        engine_kwargs["poolclass"] = StaticPool
+    else:
+        engine_kwargs["pool_pre_ping"] = True
+
+    return create_async_engine(url, **engine_kwargs)
+
+
 engine = _create_engine()
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
 
+async_engine = _create_async_engine()
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -47,6 +66,13 @@ def get_session() -> Generator[Session, None, None]:
         db.close()
 
 
+async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """Yield an asyncio SQLAlchemy session for dependency injection."""
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 @contextmanager
 def session_scope() -> Generator[Session, None, None]:
     """Provide a transactional scope for database operations."""
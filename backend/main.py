@@ -19,7 +19,7 @@ from fastapi.responses import FileResponse
 
 from backend.api.endpoints import router as api_router
 from backend.core.config import settings
-from backend.database import Base, engine
+from backend.database import Base, async_engine, engine
 from backend.graph import create_graph
 from backend.services.repositories import SQLAlchemyStatusRepository
 import backend.database.models  # noqa: F401 - ensure models are registered
@@ -99,7 +99,9 @@ async def ensure_database_schema() -> None:
     """Inicializa recursos necessários ao subir o serviço."""
 
     ensure_runtime_directories()
-    Base.metadata.create_all(bind=engine)
+    # The API handlers use the async engine, so the schema is ensured through it.
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
     graph = create_graph(status_repository=SQLAlchemyStatusRepository())
     app.state.agent_graph = graph
 
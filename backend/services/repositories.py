@@ -4,7 +4,7 @@ import uuid
 from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, Dict, Optional
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from backend.database import SessionLocal, session_scope
 from backend.database.models import Report, Task
@@ -81,7 +81,7 @@ class SQLAlchemyReportRepository(ReportRepository):
     def save_report(self, task_id: str, report: AuditReport) -> None:
         payload = to_serializable(report)
         with session_scope() as session:
-            task = session.get(Task, uuid.UUID(task_id))
+            task = session.get(Task, uuid.UUID(task_id), options=[joinedload(Task.report)])
             if task is None:
                 raise ValueError(f"Task {task_id} not found while saving report")
 
@@ -1,12 +1,21 @@
 from __future__ import annotations
 
+import shutil
 from pathlib import Path
-from typing import Dict, Iterable, List
+from typing import BinaryIO, Dict, Iterable, List
 
 from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
 
 from backend.types import StorageGateway
 
+UPLOAD_COPY_CHUNK_SIZE = 1 << 20
+
+
+def _copy_to_path(source: BinaryIO, destination: Path) -> None:
+    with destination.open("wb") as target:
+        shutil.copyfileobj(source, target, UPLOAD_COPY_CHUNK_SIZE)
+
 
 class FileStorage(StorageGateway):
     """File-system based storage for uploaded documents."""
@@ -22,8 +31,8 @@ class FileStorage(StorageGateway):
         task_dir = self._base_path / task_id
         task_dir.mkdir(parents=True, exist_ok=True)
         destination = task_dir / safe_name
-        contents = await file.read()
-        destination.write_bytes(contents)
+        # Copy the spooled upload in chunks off the event loop instead of reading it whole.
+        await run_in_threadpool(_copy_to_path, file.file, destination)
         return {"path": str(destination), "original_name": safe_name}
 
     def load_files(self, references: Iterable[Dict[str, object]]) -> List[str]:
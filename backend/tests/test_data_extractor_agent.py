@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 from zipfile import ZipFile
 
 import pytest
 
-from backend.agents.data_extractor_agent import extract_documents, _parse_tabular_text
+from backend.agents import data_extractor_agent
+from backend.agents.data_extractor_agent import (
+    NFE_STREAMING_THRESHOLD,
+    _infer_metadata_from_text,
+    _parse_nfe_xml,
+    _parse_pdf,
+    _parse_tabular_text,
+    extract_documents,
+)
 
 
 def test_extract_csv(sample_csv: Path) -> None:
@@ -69,6 +79,19 @@ def test_parse_tabular_text_from_pdf_like_content() -> None:
     assert meta.get("table_row_count") == 2
 
 
+def test_parse_tabular_text_keeps_quoted_delimiters() -> None:
+    text = (
+        "Produto;CFOP;Quantidade;Valor Total\n"
+        '"Parafuso; sextavado";5102;2;"1.200,00"\n'
+        "Arruela;5102;10;50,00\n"
+    )
+
+    data, meta = _parse_tabular_text(text, "simulado.pdf")
+    assert meta.get("table_row_count") == 2
+    assert data[0]["produto_nome"] == "Parafuso; sextavado"
+    assert data[0]["produto_valor_total"] == pytest.approx(1200.0)
+
+
 def test_extract_csv_without_headers_generates_semantic_meta(tmp_path: Path) -> None:
     content = (
         "11111111111111111111111111111111111111111111;451,50;451,50;150,50;3;5102;99887766;2024-01-10;SP;RJ;Servico Ultra\n"
@@ -91,3 +114,224 @@ def test_extract_csv_without_headers_generates_semantic_meta(tmp_path: Path) ->
     assert summary["record_count"] == 2
     assert doc.meta["visualizations"], "Expected at least one visualization suggestion."
     assert any(v.get("type") == "line" for v in doc.meta["visualizations"]), "Expected timeline visualization for dated dataset."
+
+
+def _build_nfe_xml(item_count: int) -> bytes:
+    items = "".join(
+        f'<det nItem="{index}"><prod><xProd>Produto {index}</xProd><CFOP>5102</CFOP><NCM>84719000</NCM>'
+        f"<qCom>2</qCom><vUnCom>50.00</vUnCom><vProd>100.00</vProd></prod>"
+        f"<imposto><ICMS><ICMS00><CST>00</CST><vBC>100.00</vBC><pICMS>18</pICMS><vICMS>18.00</vICMS></ICMS00></ICMS></imposto></det>"
+        for index in range(1, item_count + 1)
+    )
+    return (
+        '<nfeProc xmlns="http://www.portalfiscal.inf.br/nfe"><NFe><infNFe Id="NFe123">'
+        "<ide><dhEmi>2024-01-02T10:00:00-03:00</dhEmi></ide>"
+        "<emit><CNPJ>12345678000190</CNPJ><xNome>Emitente SA</xNome><enderEmit><UF>SP</UF></enderEmit></emit>"
+        "<dest><CNPJ>98765432000100</CNPJ><xNome>Cliente LTDA</xNome><enderDest><UF>RJ</UF></enderDest></dest>"
+        f"{items}<total><ICMSTot><vProd>{item_count * 100}.00</vProd><vNF>{item_count * 100}.00</vNF></ICMSTot></total>"
+        "</infNFe></NFe></nfeProc>"
+    ).encode("utf-8")
+
+
+@pytest.mark.parametrize("item_count", [2, 400])
+def test_parse_nfe_xml_small_and_streamed(item_count: int) -> None:
+    xml_bytes = _build_nfe_xml(item_count)
+    assert (len(xml_bytes) >= NFE_STREAMING_THRESHOLD) == (item_count > 2)
+
+    data, error = _parse_nfe_xml(xml_bytes)
+    assert error is None
+    assert len(data) == item_count
+    last = data[-1]
+    assert last["nfe_id"] == "NFe123"
+    assert last["emitente_uf"] == "SP"
+    assert last["destinatario_uf"] == "RJ"
+    assert last["produto_nome"] == f"Produto {item_count}"
+    assert last["produto_valor_icms"] == pytest.approx(18.0)
+    assert last["valor_total_nfe"] == pytest.approx(item_count * 100)
+
+
+def test_extract_zip_streams_large_nfe_xml(tmp_path: Path) -> None:
+    xml_bytes = _build_nfe_xml(400)
+    archive_path = tmp_path / "notas.zip"
+    with ZipFile(archive_path, "w") as archive:
+        archive.writestr("lote/nota.xml", xml_bytes)
+
+    docs = extract_documents([archive_path])
+    assert len(docs) == 1
+    doc = docs[0]
+    assert doc.kind == "NFE_XML"
+    assert doc.status == "parsed"
+    assert doc.size == len(xml_bytes)
+    assert doc.data and len(doc.data) == 400
+
+
+# The default prefix sees the cp1252 bytes; an 8-byte one only fails utf-8 mid-parse.
+@pytest.mark.parametrize("sniff_bytes", [data_extractor_agent.CSV_ENCODING_SNIFF_BYTES, 8])
+def test_extract_zip_streams_large_csv(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, sniff_bytes: int) -> None:
+    content = (
+        "Chave NF;Data NF;Descrição do Produto;CFOP Código;Qtde;Total Item\r\n"
+        "11111111111111111111111111111111111111111111;2024-01-02;Serviço Especial;5933;3;451,50\r\n"
+        "22222222222222222222222222222222222222222222;2024-01-03;Ação Única;5102;1;99,90\r\n"
+    ).encode("cp1252")
+    archive_path = tmp_path / "planilhas.zip"
+    with ZipFile(archive_path, "w") as archive:
+        archive.writestr("notas.csv", content)
+    in_memory = extract_documents([archive_path])[0]
+
+    monkeypatch.setattr(data_extractor_agent, "CSV_STREAMING_THRESHOLD", 0)
+    monkeypatch.setattr(data_extractor_agent, "CSV_ENCODING_SNIFF_BYTES", sniff_bytes)
+    streamed = extract_documents([archive_path])[0]
+
+    assert streamed.status == "parsed"
+    assert streamed.size == len(content)
+    assert streamed.data == in_memory.data
+    assert streamed.meta["structure"] == in_memory.meta["structure"]
+    assert streamed.meta["structure"]["encoding"] == "cp1252"
+
+
+def test_extract_zip_parses_members_in_worker_processes(
+    sample_csv: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    archive_path = tmp_path / "lote.zip"
+    with ZipFile(archive_path, "w") as archive:
+        for index in range(3):
+            archive.write(sample_csv, arcname=f"notas/nota_{index}.csv")
+    sequential = extract_documents([archive_path])
+
+    monkeypatch.setattr(data_extractor_agent, "PROCESS_POOL_MIN_BYTES", 0)
+    progress: list[tuple[int, int]] = []
+    parallel = extract_documents(
+        [archive_path], lambda current, total: progress.append((current, total)), max_workers=2
+    )
+
+    assert progress == [(1, 1), (1, 3), (2, 3), (3, 3)]
+    assert [doc.name for doc in parallel] == [doc.name for doc in sequential]
+    assert [doc.data for doc in parallel] == [doc.data for doc in sequential]
+    assert all(doc.meta["processing_stats"]["parallelized"] for doc in parallel)
+    assert not any(doc.meta["processing_stats"]["parallelized"] for doc in sequential)
+
+
+def test_extract_documents_parallel_reports_progress(
+    sample_csv: Path, sample_csv_alt: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(data_extractor_agent, "PROCESS_POOL_MIN_BYTES", 0)
+    progress: list[tuple[int, int]] = []
+    docs = extract_documents(
+        [sample_csv, sample_csv_alt], lambda current, total: progress.append((current, total)), max_workers=2
+    )
+    assert [doc.name for doc in docs] == [sample_csv.name, sample_csv_alt.name]
+    assert sorted(progress) == [(1, 2), (2, 2)]
+    assert all(doc.meta["processing_stats"]["parallelized"] for doc in docs)
+
+
+def test_extract_documents_parses_in_worker_processes_only_when_requested(
+    sample_csv: Path, sample_csv_alt: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    batch_bytes = sample_csv.stat().st_size + sample_csv_alt.stat().st_size
+    pools: list[object] = []
+    process_pool_for = data_extractor_agent._process_pool_for
+
+    def spy(jobs: int, payload_bytes: int, max_workers: int | None):
+        pool = process_pool_for(jobs, payload_bytes, max_workers)
+        pools.append(pool)
+        return pool
+
+    monkeypatch.setattr(data_extractor_agent, "_process_pool_for", spy)
+    monkeypatch.setattr(data_extractor_agent, "PROCESS_POOL_MIN_BYTES", batch_bytes)
+    threaded = extract_documents([sample_csv, sample_csv_alt])
+    pooled = extract_documents([sample_csv, sample_csv_alt], max_workers=2)
+
+    assert pools[0] is None and pools[-1] is not None
+    assert [doc.data for doc in pooled] == [doc.data for doc in threaded]
+    assert [doc.meta["column_mapping"] for doc in pooled] == [doc.meta["column_mapping"] for doc in threaded]
+
+
+class _BrokenPool:
+    def submit(self, *args: object) -> Future:
+        future: Future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        pass
+
+
+def test_extract_documents_recovers_from_a_broken_process_pool(
+    sample_csv: Path, sample_csv_alt: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    threaded = extract_documents([sample_csv, sample_csv_alt])
+
+    monkeypatch.setattr(data_extractor_agent, "PROCESS_POOL_MIN_BYTES", 0)
+    monkeypatch.setattr(data_extractor_agent, "_PROCESS_POOL", _BrokenPool())
+    recovered = extract_documents([sample_csv, sample_csv_alt], max_workers=2)
+
+    assert [doc.data for doc in recovered] == [doc.data for doc in threaded]
+    assert data_extractor_agent._PROCESS_POOL is None
+
+
+def test_extract_documents_reports_progress_in_order_without_pool(sample_csv: Path, sample_csv_alt: Path) -> None:
+    progress: list[tuple[int, int]] = []
+    docs = extract_documents([sample_csv, sample_csv_alt], lambda current, total: progress.append((current, total)))
+    assert progress == [(1, 2), (2, 2)]
+    assert not any(doc.meta["processing_stats"]["parallelized"] for doc in docs)
+
+
+def test_parse_pdf_reuses_text_for_duplicate_content(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def fake_extract(source: bytes, name: str):
+        calls.append(name)
+        return "CFOP: 5102\nValor Total: 10,00", None
+
+    monkeypatch.setattr(data_extractor_agent, "_extract_pdf_text", fake_extract)
+    payload = b"%PDF-1.4 duplicated invoice " + str(id(calls)).encode()
+
+    first = _parse_pdf(payload, "a.pdf")
+    second = _parse_pdf(payload, "b.pdf")
+
+    assert calls == ["a.pdf"]
+    assert first[1] == second[1]
+    assert second[3]["extracted_fields"]["cfop"] == "5102"
+
+
+def test_infer_metadata_keeps_cnpj_label_and_number_on_one_line() -> None:
+    access_key = "1" * 44
+    metadata = _infer_metadata_from_text(
+        f"Empresa A CNPJ\n12.345.678/0001-90\nEmpresa B CNPJ: 98.765.432/0001-10\nCNPJ {access_key}"
+    )
+    assert metadata["emitente_cnpj"] == "98765432000110"
+    assert metadata["emitente_nome"] == "Empresa B"
+    assert metadata["nfe_id"] == access_key
+
+
+def test_numeric_column_score_counts_zero_values() -> None:
+    profile = data_extractor_agent._profile_column([0, 0.0, "10,50", 3, None, ""])
+    assert profile.non_blank == 4
+    assert data_extractor_agent._score_numeric_column(profile, "coluna") == 0.5
+    assert profile.non_empty == 2
+
+
+def test_contains_alpha_ignores_unicode_numerals() -> None:
+    assert data_extractor_agent._contains_alpha("Ação")
+    assert not data_extractor_agent._contains_alpha("½ 10²")
+
+
+def test_extract_zip_recovers_members_from_a_broken_process_pool(
+    sample_csv: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    archive_path = tmp_path / "lote.zip"
+    with ZipFile(archive_path, "w") as archive:
+        for index in range(3):
+            archive.write(sample_csv, arcname=f"notas/nota_{index}.csv")
+    sequential = extract_documents([archive_path])
+
+    monkeypatch.setattr(data_extractor_agent, "PROCESS_POOL_MIN_BYTES", 0)
+    monkeypatch.setattr(data_extractor_agent, "_PROCESS_POOL", _BrokenPool())
+    progress: list[tuple[int, int]] = []
+    recovered = extract_documents(
+        [archive_path], lambda current, total: progress.append((current, total)), max_workers=2
+    )
+
+    assert progress == [(1, 1), (1, 3), (2, 3), (3, 3)]
+    assert [doc.data for doc in recovered] == [doc.data for doc in sequential]
+    assert data_extractor_agent._PROCESS_POOL is None
@@ -47,3 +47,32 @@ def test_sqlalchemy_sync_url_passthrough(monkeypatch) -> None:
     assert parsed.username == original.username
     assert parsed.host == original.host
     assert parsed.database == original.database
+
+
+def test_sqlalchemy_async_url_drivers(monkeypatch) -> None:
+    from sqlalchemy.engine import make_url
+
+    cases = {
+        "sqlite:///data/nexus.db": "sqlite+aiosqlite",
+        "sqlite+aiosqlite:///data/nexus.db": "sqlite+aiosqlite",
+        "postgresql://user:pass@db:5432/nexus": "postgresql+psycopg",
+        "postgresql+psycopg://user:pass@db:5432/nexus": "postgresql+psycopg",
+        "postgresql+asyncpg://user:pass@db:5432/nexus": "postgresql+asyncpg",
+    }
+    for dsn, drivername in cases.items():
+        monkeypatch.setenv("POSTGRES_DSN", dsn)
+        parsed = make_url(Settings().sqlalchemy_async_url)
+        assert parsed.drivername == drivername
+        assert parsed.password == make_url(dsn).password
+
+
+def test_database_engines_keep_in_memory_sqlite_on_static_pool(monkeypatch) -> None:
+    from sqlalchemy.pool import StaticPool
+
+    from backend.database import _create_async_engine, _create_engine
+
+    monkeypatch.setenv("POSTGRES_DSN", "sqlite:///:memory:")
+    app_settings = Settings()
+
+    assert isinstance(_create_engine(app_settings).pool, StaticPool)
+    assert isinstance(_create_async_engine(app_settings).sync_engine.pool, StaticPool)
@@ -4,6 +4,7 @@ from pathlib import Path
 
 from backend.agents.data_extractor_agent import extract_documents
 from backend.agents.validator_agent import run_audit
+from backend.types import ImportedDoc
 from backend.utils.rules_dictionary import INCONSISTENCIES
 
 
@@ -13,3 +14,38 @@ def test_validator_detects_inconsistencies(sample_csv_alt: Path) -> None:
     assert report.documents[0].status.name in {"ALERTA", "ERRO"}
     codes = {inc.code for inc in report.documents[0].inconsistencies}
     assert INCONSISTENCIES["CFOP_ESTADUAL_UF_INCOMPATIVEL"].code in codes
+
+
+def test_validator_runs_rules_once_per_distinct_item(monkeypatch) -> None:
+    import backend.agents.validator_agent as validator_agent
+
+    calls = []
+    original = validator_agent.run_fiscal_validation
+
+    def counting(item):
+        calls.append(item)
+        return original(item)
+
+    monkeypatch.setattr(validator_agent, "run_fiscal_validation", counting)
+    item = {
+        "produto_cfop": "5102",
+        "produto_ncm": 12345678,
+        "emitente_uf": "SP",
+        "destinatario_uf": "RJ",
+        "produto_qtd": 2,
+        "produto_valor_unit": 10.0,
+        "produto_valor_total": 20.0,
+    }
+    docs = [
+        ImportedDoc(kind="CSV", name=f"doc{i}.csv", size=1, status="parsed", data=[dict(item), dict(item)])
+        for i in range(3)
+    ]
+    docs.append(ImportedDoc(kind="CSV", name="float.csv", size=1, status="parsed", data=[{**item, "produto_ncm": 12345678.0}]))
+    report = run_audit(docs)
+
+    assert len(calls) == 2
+    uf_code = INCONSISTENCIES["CFOP_ESTADUAL_UF_INCOMPATIVEL"].code
+    for audited in report.documents[:3]:
+        assert {inc.code for inc in audited.inconsistencies} == {uf_code}
+    # 12345678.0 hashes like 12345678 but stringifies to an invalid NCM.
+    assert {inc.code for inc in report.documents[3].inconsistencies} == {uf_code, INCONSISTENCIES["NCM_INVALIDO"].code}
@@ -3,6 +3,11 @@ from __future__ import annotations
 import re
 from typing import Dict, List
 
+_NON_NUMERIC_CHARS = re.compile(r"[^0-9,.\-]")
+# "1.234,56" -> "1234.56": drop thousands dots, comma becomes the decimal point.
+_COMMA_DECIMAL_TABLE = str.maketrans({".": None, ",": "."})
+_DROP_COMMA_TABLE = str.maketrans({",": None})
+
 
 def parse_safe_float(value: object) -> float:
     """Converts a string to a float, handling different decimal and thousands separators."""
@@ -18,16 +23,16 @@ def parse_safe_float(value: object) -> float:
         return 0.0
 
     # Keep only digits, comma, dot and minus sign
-    s = "".join(filter(lambda char: char in "0123456789,.-.", s))
+    s = _NON_NUMERIC_CHARS.sub("", s)
 
     # If both comma and dot are present, assume dot is thousands separator
     if ',' in s and '.' in s:
         # If comma is after dot, comma is decimal separator
         if s.rfind(',') > s.rfind('.'):
-            s = s.replace('.', '').replace(',', '.')
+            s = s.translate(_COMMA_DECIMAL_TABLE)
         # If dot is after comma, dot is decimal separator
         else:
-            s = s.replace(',', '')
+            s = s.translate(_DROP_COMMA_TABLE)
     # If only comma is present, it's the decimal separator
     elif ',' in s:
         s = s.replace(',', '.')
@@ -6,6 +6,26 @@ from backend.types import Inconsistency
 from backend.utils.parsing import parse_safe_float
 from backend.utils.rules_dictionary import INCONSISTENCIES
 
+# Every item field run_fiscal_validation reads; items that agree on all of them
+# produce the same findings.
+RULES_KEYS = (
+    "produto_cfop",
+    "produto_ncm",
+    "produto_nome",
+    "produto_cst_icms",
+    "produto_cst_pis",
+    "produto_cst_cofins",
+    "produto_qtd",
+    "produto_valor_unit",
+    "produto_valor_total",
+    "produto_base_calculo_icms",
+    "produto_aliquota_icms",
+    "produto_valor_icms",
+    "emitente_uf",
+    "destinatario_uf",
+    "destinatario_nome",
+)
+
 
 def run_fiscal_validation(item: Dict[str, object]) -> List[Inconsistency]:
     findings: List[Inconsistency] = []